@@ -1,8 +1,15 @@
 import itertools
+import numpy
+from collections import OrderedDict
 
 class Grid:
     """ Interface of an abstract grid. """
 
+    # Directions of all created grids indexed by the list of directions given to the constructor,
+    # so that all instances of the same grid share their directions.
+    # Shared directions are immutable: a tuple of tuples and a read-only NumPy array.
+    direction_tables = {}
+
     def __init__(self, salt, probability, directions):
         """
         salt -- additional integer input to the oracle
@@ -13,7 +20,25 @@ class Grid:
         self.salt = salt * 6487304627
         self.probability = probability
         self.dimension = len(directions[0])
-        self.directions = set()
+        key = tuple(tuple(d) for d in directions)
+        if not key in Grid.direction_tables:
+            expanded = tuple(Grid.expand_directions(directions))
+            array = numpy.array(expanded, dtype=numpy.int64)
+            array.flags.writeable = False
+            Grid.direction_tables[key] = (expanded, array)
+        self.directions, self.direction_array = Grid.direction_tables[key]
+#        print("Directions: ", self.directions)
+
+        # Neighbour cache which is disabled by default; see enable_cache.
+        self.cache = None
+        self.cache_capacity = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def expand_directions(directions):
+        """ Return the list of all permutations of given directions with all combinations of signs. """
+        expanded = set()
         for d in directions:
             perm = list(set(itertools.permutations(d)))
             for n in range(len(d)+1):
@@ -21,10 +46,19 @@ class Grid:
                     for p in perm:
                         p = list(p)
                         for i in c:
-                            p[i] = -p[i]                    
-                        self.directions.add(tuple(p))
-        self.directions = list(self.directions)
-#        print("Directions: ", self.directions)
+                            p[i] = -p[i]
+                        expanded.add(tuple(p))
+        return list(expanded)
+
+    def enable_cache(self, capacity):
+        """
+            Remember neighbours of at most capacity recently queried vertices; the least recently used vertex is evicted first.
+            Capacity 0 disables the cache. Counters of hits and misses are reset.
+        """
+        self.cache = OrderedDict() if capacity > 0 else None
+        self.cache_capacity = capacity
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def oracle(self, u, v):
         """
@@ -42,9 +76,62 @@ class Grid:
         return abs(acc) < self.probability * prime
 
     def neighbours(self, vertex):
-        """ Return a list of all neighbours of a given vertex. """
+        """ Return a list of all neighbours of a given vertex. The returned list must not be modified if the cache is enabled. """
+        if self.cache is not None:
+            if vertex in self.cache:
+                self.cache_hits += 1
+                self.cache.move_to_end(vertex)
+                return self.cache[vertex]
+            self.cache_misses += 1
         grid_neighbours = [ tuple(a+b for (a,b) in zip(vertex,d)) for d in self.directions ]
-        return [ u for u in grid_neighbours if self.oracle(vertex,u) ]
+        result = [ u for u in grid_neighbours if self.oracle(vertex,u) ]
+        if self.cache is not None:
+            self.cache[vertex] = result
+            if len(self.cache) > self.cache_capacity:
+                self.cache.popitem(last=False)
+        return result
+
+    def oracle_many(self, u, v):
+        """
+            Vectorized version of oracle for many pairs of vertices at once.
+            u, v -- integer arrays of shape (n, dimension); the i-th pair is u[i] and v[i]
+            Return a boolean array of length n which is bit-identical to oracle applied on every pair.
+        """
+        u = numpy.asarray(u, dtype=numpy.int64).reshape(-1, self.dimension)
+        v = numpy.asarray(v, dtype=numpy.int64).reshape(-1, self.dimension)
+
+        # Lexicographic comparison of tuples, so that both vertices are hashed in the same order as in oracle.
+        less = numpy.zeros(len(u), dtype=bool)
+        equal = numpy.ones(len(u), dtype=bool)
+        for i in range(self.dimension):
+            less |= equal & (v[:,i] < u[:,i])
+            equal &= v[:,i] == u[:,i]
+        first = numpy.where(less[:,None], v, u)
+        second = numpy.where(less[:,None], u, v)
+
+        # The salt is reduced modulo the prime so that acc * salt fits into 64 bits.
+        # Since the accumulator is always reduced, the result equals the one computed by oracle using Python integers.
+        prime = 2147483647
+        salt = self.salt % prime
+        acc = numpy.full(len(u), prime//2, dtype=numpy.int64)
+        for x in [first, second]:
+            for i in range(self.dimension):
+                acc = (acc * salt + x[:,i]) % prime
+        return acc < self.probability * prime
+
+    def neighbours_batch(self, vertices):
+        """
+            Vectorized version of neighbours for a whole array of vertices.
+            vertices -- integer array of shape (n, dimension)
+            Return a pair (candidates, mask) where candidates is an array of shape (n, len(directions), dimension)
+            containing all neighbours in the whole grid and mask is a boolean array of shape (n, len(directions))
+            marking edges present in the subgraph. Hence, candidates[i][mask[i]] lists neighbours(vertices[i]) in the same order.
+        """
+        vertices = numpy.asarray(vertices, dtype=numpy.int64).reshape(-1, self.dimension)
+        candidates = vertices[:,None,:] + self.direction_array[None,:,:]
+        origins = numpy.broadcast_to(vertices[:,None,:], candidates.shape)
+        mask = self.oracle_many(origins, candidates).reshape(candidates.shape[:2])
+        return candidates, mask
 
 # All grids follows.
 # See file task.md for description of all grids.
@@ -5,6 +5,7 @@
 # See file task.md for description of all grids.
 
 import math
+import numpy
 from graphs import Grid2D, GridDiagonal2D, GridGreatKing2D, GridRook2D, GridJumper2D, Grid3D, GridFaceDiagonal3D, GridAllDiagonal3D
 
 # For two points a and b in the n-dimensional space, return the d-dimensional point r such that r_i = | a_i - b_i | for i = 1...d
@@ -42,3 +43,136 @@ def grid_rook_2D_heuristic(current, destination):
 def grid_jumper_2D_heuristic(current, destination):
     x,y = distance_in_each_coordinate(current,destination) 
     return(math.ceil(max((x+y)/3,x/3,y/2)))
+
+# Vectorized versions of the heuristics above used by monotonicity_tests.
+# Every function receives an integer array of shape (n, dimension) of points and a single destination
+# and returns an integer array of n values equal to the corresponding heuristic.
+
+def distance_in_each_coordinate_vectorized(x, y):
+    return numpy.abs(numpy.asarray(x, dtype=numpy.int64) - numpy.asarray(y, dtype=numpy.int64))
+
+def grid_2D_heuristic_vectorized(current, destination):
+    return distance_in_each_coordinate_vectorized(current, destination).sum(axis=1)
+
+def grid_diagonal_2D_heuristic_vectorized(current, destination):
+    return distance_in_each_coordinate_vectorized(current, destination).max(axis=1)
+
+def grid_3D_heuristic_vectorized(current, destination):
+    return distance_in_each_coordinate_vectorized(current, destination).sum(axis=1)
+
+def grid_face_diagonal_3D_heuristic_vectorized(current, destination):
+    r = distance_in_each_coordinate_vectorized(current, destination)
+    return numpy.maximum(r.max(axis=1), -(-r.sum(axis=1) // 2))
+
+def grid_all_diagonal_3D_heuristic_vectorized(current, destination):
+    # The Euclidean distance is never smaller than the maximal coordinate, so the minimum is always the maximal coordinate.
+    return distance_in_each_coordinate_vectorized(current, destination).max(axis=1)
+
+def grid_great_king_2D_heuristic_vectorized(current, destination):
+    return -(-distance_in_each_coordinate_vectorized(current, destination).sum(axis=1) // 16)
+
+def grid_rook_2D_heuristic_vectorized(current, destination):
+    return -(-distance_in_each_coordinate_vectorized(current, destination).sum(axis=1) // 8)
+
+def grid_jumper_2D_heuristic_vectorized(current, destination):
+    r = distance_in_each_coordinate_vectorized(current, destination)
+    x, y = r[:,0], r[:,1]
+    return numpy.maximum(numpy.maximum(-(-(x+y) // 3), -(-x // 3)), -(-y // 2))
+
+def norm_lower_bound(grid):
+    """
+    Return a monotonic heuristic for a given grid which works for every set of directions.
+    A single move changes the L1 norm of the difference by at most the largest L1 norm of a direction and similarly for the maximum norm.
+    """
+    step_sum = max(sum(abs(a) for a in d) for d in grid.directions)
+    step_max = max(max(abs(a) for a in d) for d in grid.directions)
+    def heuristic(current, destination):
+        r = distance_in_each_coordinate(current, destination)
+        return max(-(-sum(r) // step_sum), -(-max(r) // step_max))
+    return heuristic
+
+def parity_lower_bound(heuristic):
+    """
+    Return a monotonic heuristic which rounds a given monotonic heuristic up to the parity of the sum of differences of coordinates.
+    It is valid for grids where every direction has an odd sum of coordinates, e.g. GridJumper2D, since every move changes the parity
+    of the sum, so the parity of the distance is the parity of the sum.
+    """
+    def rounded(current, destination):
+        h = heuristic(current, destination)
+        return h + ((h - sum(distance_in_each_coordinate(current, destination))) & 1)
+    return rounded
+
+def _grid_distances(grid, radius):
+    """
+    Compute distances from the origin to all points of the box [-radius,radius]^d in the whole grid restricted to the box.
+    Return a NumPy array where -1 marks points unreachable inside the box.
+    """
+    size = 2*radius + 1
+    distance = numpy.full((size,)*grid.dimension, -1, dtype=numpy.int32)
+    frontier = numpy.zeros(distance.shape, dtype=bool)
+    frontier[(radius,)*grid.dimension] = True
+    level = 0
+    while frontier.any():
+        distance[frontier] = level
+        level += 1
+        reached = numpy.zeros(distance.shape, dtype=bool)
+        for d in grid.directions:
+            # Move the whole frontier by the direction d.
+            target = tuple(slice(max(a, 0), size + min(a, 0)) for a in d)
+            source = tuple(slice(max(-a, 0), size + min(-a, 0)) for a in d)
+            reached[target] |= frontier[source]
+        frontier = reached & (distance < 0)
+    return distance
+
+def exact_distance_heuristic(grid, radius, closed_form=None):
+    """
+    Return a monotonic heuristic using exact distances in the whole grid (i.e. with probability 1) for points close to the destination.
+    grid -- an instance of a Grid whose directions are used; its oracle is ignored
+    radius -- exact distances are stored for points whose difference from the destination is at most radius in every coordinate
+    closed_form -- a monotonic heuristic used for other points; norm_lower_bound(grid) by default
+
+    Let T be the minimal distance of a point outside the table. Then min(exact distance, T) inside the table and T outside the table
+    is monotonic, and the heuristic returns its maximum with the closed form which is also monotonic.
+    """
+    if closed_form is None:
+        closed_form = norm_lower_bound(grid)
+    step = max(max(abs(a) for a in d) for d in grid.directions)
+
+    # Distances computed inside a box of a given size are exact for points close to the center
+    # if every path leaving the box and returning back is not shorter.
+    # Exact distances are needed for all points whose coordinates are at most radius + step to determine T.
+    inner = radius + step
+    box = 2*inner
+    while True:
+        distance = _grid_distances(grid, box)
+        center = distance[(slice(box - inner, box + inner + 1),)*grid.dimension]
+        exit_length = -(-(box + 1) // step) + -(-(box + 1 - inner) // step)
+        if (center >= 0).all() and center.max() <= exit_length:
+            break
+        box *= 2
+
+    ring = numpy.ones(center.shape, dtype=bool)
+    ring[(slice(step, step + 2*radius + 1),)*grid.dimension] = False
+    limit = int(center[ring].min())
+    table = numpy.minimum(center[(slice(step, step + 2*radius + 1),)*grid.dimension], limit)
+
+    def heuristic(current, destination):
+        h = closed_form(current, destination)
+        index = tuple(a - b + radius for (a,b) in zip(current, destination))
+        if all(0 <= i <= 2*radius for i in index):
+            return max(h, int(table[index]))
+        return max(h, limit)
+    return heuristic
+
+def lazy_heuristic(factory):
+    """ Return a heuristic which builds the actual heuristic by calling factory() on its first use, so importing this module stays fast. """
+    built = []
+    def heuristic(current, destination):
+        if not built:
+            built.append(factory())
+        return built[0](current, destination)
+    return heuristic
+
+# Heuristics using exact distances near the destination for grids where closed forms are loose; tables are computed on the first use.
+grid_jumper_2D_exact_heuristic = lazy_heuristic(lambda: exact_distance_heuristic(GridJumper2D(0, 1), 32, parity_lower_bound(norm_lower_bound(GridJumper2D(0, 1)))))
+grid_great_king_2D_exact_heuristic = lazy_heuristic(lambda: exact_distance_heuristic(GridGreatKing2D(0, 1), 32))
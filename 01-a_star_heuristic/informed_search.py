@@ -1,4 +1,20 @@
 import heapq
+from array import array
+from collections import OrderedDict
+from time import perf_counter
+
+# Maximal number of vertices visited by A*.
+VISITED_LIMIT = 3000000
+
+# CompactVertices needs roughly a quarter of the memory of Vertex objects, so the compact storage may visit four times more vertices.
+COMPACT_VISITED_LIMIT = 4 * VISITED_LIMIT
+
+# IDA* stores only the current path and a bounded transposition table, so its memory does not grow with the number of expansions.
+# It expands vertices again in every iteration and trades time for memory, so the limit only stops searches which would run for about ten minutes.
+IDA_EXPANDED_LIMIT = 10 * VISITED_LIMIT
+
+# Default number of vertices remembered by each of the two transposition tables of IDA*; the tables are what limits its memory.
+TRANSPOSITION_TABLE_SIZE = 1 << 18
 
 class Vertex:
     """ Addition data for every vertex visited by A* """
@@ -12,6 +28,237 @@ class Vertex:
     def __lt__(self, other):
         return self.distance > other.distance
 
+class HeapFrontier:
+    """
+    Binary heap of vertices ordered by their priorities.
+    Ties are broken by comparing items, so Vertex.__lt__ prefers vertices of larger distance.
+    """
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, priority, distance, item):
+        heapq.heappush(self.heap, (priority, item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[1]
+
+class PackedHeapFrontier(HeapFrontier):
+    """
+    Binary heap of indices of CompactVertices.
+    Every entry is a single integer packing (priority, -distance, index), so items are popped by priority and distance like in HeapFrontier,
+    but items of the same priority and distance are popped by the smallest index while HeapFrontier leaves their order to the heap.
+    """
+    MASK = (1 << 32) - 1
+
+    def push(self, priority, distance, item):
+        heapq.heappush(self.heap, (priority << 64) | ((self.MASK - distance) << 32) | item)
+
+    def pop(self):
+        return heapq.heappop(self.heap) & self.MASK
+
+class BucketFrontier:
+    """
+    Bucket queue for integer priorities which is possible since all edges have unit cost and heuristics return integers.
+    Items of the same priority are grouped by their distance and the largest distance is popped first like in HeapFrontier.
+    Items of the same priority and distance are popped in the order of insertion; popping the newest one first would follow
+    a single branch of equal priority and visit many more vertices on grids with large plateaus, e.g. GridAllDiagonal3D.
+    Every bucket keeps a heap of its distinct distances, so the logarithmic cost is paid only once per a distance, not per an item.
+    """
+    def __init__(self):
+        # Dictionary from a priority to a dictionary from a distance to a list of items.
+        # The first element of every list is the position of the next item to be popped;
+        # a deque would need several times more memory since most lists are short.
+        self.buckets = {}
+        # Dictionary from a priority to a heap of negated distances present in the bucket.
+        self.distances = {}
+        # No bucket has smaller priority than the minimum.
+        self.minimum = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, priority, distance, item):
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            self.minimum = min(self.minimum, priority) if self.size else priority
+            self.buckets[priority] = { distance: [1, item] }
+            self.distances[priority] = [ -distance ]
+        elif distance in bucket:
+            bucket[distance].append(item)
+        else:
+            bucket[distance] = [1, item]
+            heapq.heappush(self.distances[priority], -distance)
+        self.size += 1
+
+    def pop(self):
+        while self.minimum not in self.buckets:
+            self.minimum += 1
+        priority = self.minimum
+        bucket = self.buckets[priority]
+        distances = self.distances[priority]
+        distance = -distances[0]
+        items = bucket[distance]
+        position = items[0]
+        item = items[position]
+        items[0] = position + 1
+        if position + 1 == len(items):
+            del bucket[distance]
+            heapq.heappop(distances)
+            if not bucket:
+                del self.buckets[priority]
+                del self.distances[priority]
+        self.size -= 1
+        return item
+
+# Frontiers which can be selected in informed_search.
+FRONTIERS = {
+    "heap": HeapFrontier,
+    "bucket": BucketFrontier,
+}
+
+class CompactVertices:
+    """
+    Vertices visited by A* stored in parallel typed arrays instead of Vertex objects.
+    Every vertex has an index into the arrays and its coordinates are packed into a single integer key.
+    Keys are found using an open addressing hash table storing only indices of vertices.
+    """
+    __slots__ = ("origin", "keys", "distance", "heuristic", "predecessor", "explored", "table", "shift")
+
+    # Number of bits of every coordinate in a key; coordinates are relative to the origin.
+    BITS = 21
+    OFFSET = 1 << (BITS - 1)
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.keys = array("q")
+        self.distance = array("i")
+        self.heuristic = array("i")
+        self.predecessor = array("i")
+        self.explored = bytearray()
+        self.table = array("i", [-1]) * 1024
+        self.shift = 64 - 10
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key(self, coord):
+        """ Pack coordinates into a key. Raise OverflowError if the vertex is too far from the origin. """
+        key = 0
+        for i, (c, o) in enumerate(zip(coord, self.origin)):
+            c = c - o + self.OFFSET
+            if not 0 <= c < 2*self.OFFSET:
+                raise OverflowError("Vertex {} is too far from the origin {}".format(coord, self.origin))
+            key |= c << (i*self.BITS)
+        return key
+
+    def coord(self, index):
+        """ Unpack coordinates of a vertex of a given index. """
+        key = self.keys[index]
+        mask = 2*self.OFFSET - 1
+        return tuple(((key >> (i*self.BITS)) & mask) - self.OFFSET + o for i, o in enumerate(self.origin))
+
+    def find(self, key):
+        """ Return the index of a vertex of a given key or -1 if the vertex has not been visited. """
+        table, keys = self.table, self.keys
+        mask = len(table) - 1
+        slot = ((key * 11400714819323198485) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+        while True:
+            index = table[slot]
+            if index < 0 or keys[index] == key:
+                return index
+            slot = (slot + 1) & mask
+
+    def add(self, key, distance, heuristic, predecessor):
+        """ Insert a new vertex which is not visited yet and return its index. """
+        index = len(self.keys)
+        self.keys.append(key)
+        self.distance.append(distance)
+        self.heuristic.append(heuristic)
+        self.predecessor.append(predecessor)
+        self.explored.append(0)
+        if 3*len(self.keys) > 2*len(self.table):
+            self.table = array("i", [-1]) * (2*len(self.table))
+            self.shift -= 1
+            for i in range(len(self.keys)):
+                self._insert(i)
+        else:
+            self._insert(index)
+        return index
+
+    def _insert(self, index):
+        table = self.table
+        mask = len(table) - 1
+        slot = ((self.keys[index] * 11400714819323198485) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+        while table[slot] >= 0:
+            slot = (slot + 1) & mask
+        table[slot] = index
+
+    def vertex(self, index):
+        """ Create a chain of Vertex objects from the origin to a vertex of a given index, so that check_path can verify it. """
+        path = []
+        while index >= 0:
+            path.append(index)
+            index = self.predecessor[index]
+        vertex = None
+        for index in reversed(path):
+            vertex = Vertex(self.coord(index), self.distance[index], self.heuristic[index], vertex)
+        return vertex
+
+class SearchStats:
+    """
+    Statistics of a single run of informed_search which is collected if an instance is passed as the argument stats.
+    expanded -- number of explored vertices
+    generated -- number of neighbours returned by the graph for explored vertices
+    reopened -- number of visited vertices whose distance was decreased
+    heap_peak -- maximal number of items in the priority queue
+    times -- running times in seconds spent by the phases "heuristic", "neighbours" and "queue"
+    total_time -- running time of the whole search in seconds
+    callback -- a function called as callback(stats, vertex) after every expansion of a vertex; optional
+    """
+    PHASES = ("heuristic", "neighbours", "queue")
+
+    def __init__(self, callback=None):
+        self.expanded = 0
+        self.generated = 0
+        self.reopened = 0
+        self.heap_peak = 0
+        self.times = { phase: 0.0 for phase in self.PHASES }
+        self.total_time = 0.0
+        self.callback = callback
+
+    def timed(self, phase, function):
+        """ Return the function wrapped so that its running time is added to a given phase. """
+        times = self.times
+        def wrapper(*args):
+            start = perf_counter()
+            result = function(*args)
+            times[phase] += perf_counter() - start
+            return result
+        return wrapper
+
+    def other_time(self):
+        """ Return the running time which is not spent by any phase, i.e. bookkeeping of the search itself. """
+        return self.total_time - sum(self.times.values())
+
+class ProfiledFrontier:
+    """ Frontier which forwards all operations to another frontier and measures them in SearchStats. """
+    def __init__(self, frontier, stats):
+        self.frontier = frontier
+        self.stats = stats
+        self.pop = stats.timed("queue", frontier.pop)
+        self._push = stats.timed("queue", frontier.push)
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def push(self, priority, distance, item):
+        self._push(priority, distance, item)
+        self.stats.heap_peak = max(self.stats.heap_peak, len(self.frontier))
+
 def check_path(graph, origin, destination):
     """ Test whether A* found a proper path. """
     vertex = destination
@@ -22,13 +269,38 @@ def check_path(graph, origin, destination):
         vertex = vertex.predecessor
     assert vertex == origin
 
-def informed_search(graph, heuristic, origin_coord, destination_coord):
+def informed_search(graph, heuristic, origin_coord, destination_coord, compact=False, frontier="heap", stats=None):
     """
     A* algorithm finding a shortest path between two given coordinates using a given heuristic function.
     Return a pair of integers containing the length of a shortest path and the number of vertices visited during the algorithm.
     Fails if no path exists.
+    If compact is set, visited vertices are stored in CompactVertices; see compact_informed_search.
+    frontier -- name of the priority queue from FRONTIERS
+    stats -- an instance of SearchStats to be filled during the search; statistics are not collected in the compact storage,
+        so ValueError is raised if both compact and stats are given
     """
 
+    if compact:
+        if stats is not None:
+            raise ValueError("Statistics are not collected in the compact storage")
+        return compact_informed_search(graph, heuristic, origin_coord, destination_coord, frontier)
+
+    if stats is not None:
+        start_time = perf_counter()
+        try:
+            return _informed_search(graph, heuristic, origin_coord, destination_coord, frontier, stats)
+        finally:
+            stats.total_time += perf_counter() - start_time
+    return _informed_search(graph, heuristic, origin_coord, destination_coord, frontier, None)
+
+def _informed_search(graph, heuristic, origin_coord, destination_coord, frontier, stats):
+    """ A* algorithm of informed_search; if stats is given, the heuristic, neighbours and the queue are measured. """
+
+    neighbours = graph.neighbours
+    if stats is not None:
+        heuristic = stats.timed("heuristic", heuristic)
+        neighbours = stats.timed("neighbours", neighbours)
+
     h = heuristic(destination_coord, destination_coord)
     if not isinstance(h, int):
         return (False, "Heuristic function must always return an integer", 0, 0)
@@ -44,18 +316,20 @@ def informed_search(graph, heuristic, origin_coord, destination_coord):
     # Dictionary which gives additional information stored in Vertex for given coordinates of visited point.
     visited = { origin_coord : origin }
 
-    # A heap of vertices.
+    # A priority queue of vertices.
     # Since all tested graph has very small degree, decreasing priority would be inefficient.
-    # Therefore, a single vertex may have multiple occurrences in the heap.
-    queue = []
-    heapq.heappush(queue, (origin.distance+origin.heuristic,origin))
+    # Therefore, a single vertex may have multiple occurrences in the queue.
+    queue = FRONTIERS[frontier]()
+    if stats is not None:
+        queue = ProfiledFrontier(queue, stats)
+    queue.push(origin.distance+origin.heuristic, origin.distance, origin)
 
     while queue:
-        if len(visited) > 3000000:
+        if len(visited) > VISITED_LIMIT:
             print("Your heuristic is too inefficient so you need to find a better heuristic.")
             return (False, "Too many visited vertices", 0, 0)
 
-        _,explore = heapq.heappop(queue)
+        explore = queue.pop()
         assert not explore.predecessor or explore.distance == explore.predecessor.distance + 1
 
         # Terminate when the destination is reached.
@@ -68,8 +342,13 @@ def informed_search(graph, heuristic, origin_coord, destination_coord):
             explore.explored = True
             distance = explore.distance + 1
 
+            explore_neighbours = neighbours(explore.coord)
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += len(explore_neighbours)
+
             # Visit all neighbours
-            for visit_coord in graph.neighbours(explore.coord):
+            for visit_coord in explore_neighbours:
                 if not visit_coord in visited:
                     h = heuristic(visit_coord, destination_coord)
                     if not isinstance(h, int) or h < 0:
@@ -77,7 +356,7 @@ def informed_search(graph, heuristic, origin_coord, destination_coord):
                         return (False, "Heuristic function must always return a non-negative integer", 0, 0)
                     visit = Vertex(visit_coord, distance, h, explore)
                     visited[visit_coord] = visit
-                    heapq.heappush(queue, (visit.distance+visit.heuristic,visit))
+                    queue.push(visit.distance+visit.heuristic, visit.distance, visit)
 
                 else:
                     visit = visited[visit_coord]
@@ -87,7 +366,9 @@ def informed_search(graph, heuristic, origin_coord, destination_coord):
                         # but finding the vertex in the queue or updating its position would not be more efficient.
                         visit.distance = distance
                         visit.predecessor = explore
-                        heapq.heappush(queue, (visit.distance+visit.heuristic,visit))
+                        queue.push(visit.distance+visit.heuristic, visit.distance, visit)
+                        if stats is not None:
+                            stats.reopened += 1
 
                 if explore.heuristic > visit.heuristic + 1:
                     print("Your heuristic from", explore.coord, "to", destination_coord, "is", explore.heuristic,
@@ -95,4 +376,319 @@ def informed_search(graph, heuristic, origin_coord, destination_coord):
                         "which fails the monotonic property since the distance between", explore.coord, "and", visit.coord, "is 1.")
                     return (False, "Heuristic must be monotonic", 0, 0)
 
+            if stats is not None and stats.callback is not None:
+                stats.callback(stats, explore)
+
+    assert False, "A path exists in all tests"
+
+def bidirectional_informed_search(graph, heuristic, origin_coord, destination_coord):
+    """
+    Bidirectional A* algorithm finding a shortest path between two given coordinates using a given heuristic function.
+    The forward search estimates the distance to the destination and the backward search estimates the distance to the origin,
+    which is valid since every grid is undirected.
+    The side with the smaller minimal priority is expanded and ties go to the forward search, so on large plateaus of equal priority
+    the search proceeds like informed_search instead of running two searches which pass each other.
+    On random subgraphs both searches have to expand the vertices of priority below the distance before the search stops,
+    so it visits up to twice as many vertices as informed_search there even though neighbours which cannot shorten the best path found so far
+    are not stored. It visits fewer vertices only on small tests of GridRook2D and GridGreatKing2D; the stopping rule of MM using minimal
+    distances of both searches and the bounds of DIBBS did not visit fewer vertices than informed_search on the larger tests either,
+    so this function is only a baseline for informed_search_benchmark.py.
+    Return the same quadruple as informed_search where visited vertices of both searches are counted.
+    Fails if no path exists.
+    """
+
+    for coord in [origin_coord, destination_coord]:
+        h = heuristic(coord, coord)
+        if not isinstance(h, int):
+            return (False, "Heuristic function must always return an integer", 0, 0)
+        if h != 0:
+            return (False, "Heuristic from the destination to the destination must be zero", 0, 0)
+
+    # Both searches are stored in the same way as in informed_search; index 0 is the forward one and index 1 the backward one.
+    targets = (destination_coord, origin_coord)
+    visited = ({}, {})
+    queues = ([], [])
+    for side, coord in enumerate([origin_coord, destination_coord]):
+        h = heuristic(coord, targets[side])
+        if not isinstance(h, int) or h < 0:
+            print("Your heuristic from", coord, "to", targets[side], "is", h, "which is not a non-negative integer")
+            return (False, "Heuristic must be a non-negative integer", 0, 0)
+        vertex = Vertex(coord, 0, h, None)
+        visited[side][coord] = vertex
+        heapq.heappush(queues[side], (vertex.distance+vertex.heuristic,vertex))
+
+    # The length of a shortest path found so far and the vertex where both searches met.
+    best = 0 if origin_coord == destination_coord else None
+    meeting_coord = origin_coord
+
+    while queues[0] and queues[1]:
+        if len(visited[0]) + len(visited[1]) > VISITED_LIMIT:
+            print("Your heuristic is too inefficient so you need to find a better heuristic.")
+            return (False, "Too many visited vertices", 0, 0)
+
+        # Remove already explored vertices from the tops of heaps, so that the tops give the minimal priorities.
+        for queue in queues:
+            while queue and queue[0][1].explored:
+                heapq.heappop(queue)
+        if not queues[0] or not queues[1]:
+            break
+
+        # Every path shorter than best has to be longer than the minimal priority in both queues
+        # since the heuristic is a lower bound on the remaining distance in both directions.
+        if best is not None and best <= max(queues[0][0][0], queues[1][0][0]):
+            break
+
+        # Expand the search having the smaller minimal priority.
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        other = visited[1-side]
+        target_coord = targets[side]
+        _,explore = heapq.heappop(queues[side])
+        explore.explored = True
+        distance = explore.distance + 1
+
+        for visit_coord in graph.neighbours(explore.coord):
+            if not visit_coord in visited[side]:
+                h = heuristic(visit_coord, target_coord)
+                if not isinstance(h, int) or h < 0:
+                    print("Your heuristic from", visit_coord, "to", target_coord, "is", h, "which is not a non-negative integer")
+                    return (False, "Heuristic function must always return a non-negative integer", 0, 0)
+                # A vertex which cannot shorten the best path found so far does not need to be visited.
+                if best is not None and distance + h >= best and not (visit_coord in other and distance + other[visit_coord].distance < best):
+                    continue
+                visit = Vertex(visit_coord, distance, h, explore)
+                visited[side][visit_coord] = visit
+                heapq.heappush(queues[side], (visit.distance+visit.heuristic,visit))
+
+            else:
+                visit = visited[side][visit_coord]
+                if visit.distance > distance:
+                    assert not visit.explored, "The distance of explored vertices cannot be decreased if the heuristic is monotonic"
+                    visit.distance = distance
+                    visit.predecessor = explore
+                    heapq.heappush(queues[side], (visit.distance+visit.heuristic,visit))
+
+            if explore.heuristic > visit.heuristic + 1:
+                print("Your heuristic from", explore.coord, "to", target_coord, "is", explore.heuristic,
+                    "and heuristic from", visit.coord, "to", target_coord, "is", visit.heuristic,
+                    "which fails the monotonic property since the distance between", explore.coord, "and", visit.coord, "is 1.")
+                return (False, "Heuristic must be monotonic", 0, 0)
+
+            # Both searches met in this vertex.
+            if visit_coord in other and (best is None or visit.distance + other[visit_coord].distance < best):
+                best = visit.distance + other[visit_coord].distance
+                meeting_coord = visit_coord
+
+    assert best is not None, "A path exists in all tests"
+
+    # Append the path of the backward search to the path of the forward search, so that check_path can verify it.
+    vertex = visited[0][meeting_coord]
+    backward = visited[1][meeting_coord].predecessor
+    while backward:
+        vertex = Vertex(backward.coord, vertex.distance + 1, backward.heuristic, vertex)
+        backward = backward.predecessor
+    assert vertex.coord == destination_coord and vertex.distance == best
+    check_path(graph, visited[0][origin_coord], vertex)
+    return (True, "Correct", best, len(visited[0]) + len(visited[1]))
+
+def compact_informed_search(graph, heuristic, origin_coord, destination_coord, frontier="heap"):
+    """
+    A* algorithm with the same interface as informed_search storing visited vertices in CompactVertices.
+    The heap contains integers packing the triple (f, -g, index), so vertices are explored in the same order of f and g as in informed_search
+    while every entry of the heap is a single integer object.
+    Vertices of equal f and g are explored in the order of their indices, so the number of visited vertices may differ from informed_search.
+    frontier -- name of the priority queue from FRONTIERS where "heap" is replaced by PackedHeapFrontier
+    """
+
+    h = heuristic(destination_coord, destination_coord)
+    if not isinstance(h, int):
+        return (False, "Heuristic function must always return an integer", 0, 0)
+    if h != 0:
+        return (False, "Heuristic from the destination to the destination must be zero", 0, 0)
+
+    h = heuristic(origin_coord, destination_coord)
+    if not isinstance(h, int) or h < 0:
+        print("Your heuristic from", origin_coord, "to", destination_coord, "is", h, "which is not a non-negative integer")
+        return (False, "Heuristic must be a non-negative integer", 0, 0)
+
+    vertices = CompactVertices(origin_coord)
+    distances, heuristics, predecessors, explored = vertices.distance, vertices.heuristic, vertices.predecessor, vertices.explored
+    try:
+        destination_key = vertices.key(destination_coord)
+        origin = vertices.add(vertices.key(origin_coord), 0, h, -1)
+    except OverflowError as e:
+        return (False, str(e), 0, 0)
+
+    queue = PackedHeapFrontier() if frontier == "heap" else FRONTIERS[frontier]()
+    queue.push(h, 0, origin)
+
+    while queue:
+        if len(vertices) > COMPACT_VISITED_LIMIT:
+            print("Your heuristic is too inefficient so you need to find a better heuristic.")
+            return (False, "Too many visited vertices", 0, 0)
+
+        explore = queue.pop()
+
+        # Terminate when the destination is reached.
+        if vertices.keys[explore] == destination_key:
+            path = vertices.vertex(explore)
+            first = path
+            while first.predecessor:
+                first = first.predecessor
+            assert first.coord == origin_coord
+            check_path(graph, first, path)
+            return (True, "Correct", distances[explore], len(vertices))
+
+        # Explore all neighbours if this vertex has not been explored yet.
+        elif not explored[explore]:
+            explored[explore] = 1
+            explore_coord = vertices.coord(explore)
+            explore_heuristic = heuristics[explore]
+            distance = distances[explore] + 1
+
+            # Visit all neighbours
+            for visit_coord in graph.neighbours(explore_coord):
+                try:
+                    key = vertices.key(visit_coord)
+                except OverflowError as e:
+                    return (False, str(e), 0, 0)
+                visit = vertices.find(key)
+                if visit < 0:
+                    h = heuristic(visit_coord, destination_coord)
+                    if not isinstance(h, int) or h < 0:
+                        print("Your heuristic from", visit_coord, "to", destination_coord, "is", h, "which is not a non-negative integer")
+                        return (False, "Heuristic function must always return a non-negative integer", 0, 0)
+                    visit = vertices.add(key, distance, h, explore)
+                    queue.push(distance+h, distance, visit)
+
+                else:
+                    h = heuristics[visit]
+                    if distances[visit] > distance:
+                        assert not explored[visit], "The distance of explored vertices cannot be decreased if the heuristic is monotonic"
+                        distances[visit] = distance
+                        predecessors[visit] = explore
+                        queue.push(distance+h, distance, visit)
+
+                if explore_heuristic > h + 1:
+                    print("Your heuristic from", explore_coord, "to", destination_coord, "is", explore_heuristic,
+                        "and heuristic from", visit_coord, "to", destination_coord, "is", h,
+                        "which fails the monotonic property since the distance between", explore_coord, "and", visit_coord, "is 1.")
+                    return (False, "Heuristic must be monotonic", 0, 0)
+
     assert False, "A path exists in all tests"
+
+def ida_star_search(graph, heuristic, origin_coord, destination_coord, table_size=TRANSPOSITION_TABLE_SIZE):
+    """
+    Iterative-deepening A* finding a shortest path between two given coordinates using a given heuristic function.
+    Every iteration is a depth-first search bounded by a priority, and the search keeps only the current path on an explicit stack
+    where every vertex stores the index of its next direction, so neighbours are generated lazily like in Grid.neighbours.
+    Two transposition tables of at most table_size vertices are used:
+    the first one remembers the smallest distance a vertex was reached in the current iteration, so duplicate paths are pruned;
+    the second one remembers lower bounds on the distance to the destination backed up from searched subtrees,
+    which improve the heuristic in later iterations.
+    The lower bound of a vertex is the minimum over its neighbours of the backed-up bound of a searched neighbour
+    or the estimate of a pruned neighbour plus one, and it also raises the bound of the next iteration.
+    Return the same quadruple as informed_search where visited is the number of expansions in all iterations,
+    counted like SearchStats.expanded, so a vertex expanded in several iterations is counted every time.
+    Fails if no path exists.
+    The search trades time for memory: every iteration repeats the previous ones and the transposition tables are not large enough
+    to keep all vertices of the large tests, so it is many times slower than informed_search on them.
+    The stack needs only a few objects per vertex of the current path, so memory is limited by table_size;
+    IDA_EXPANDED_LIMIT is a bound on the running time, not on memory; exceeding it is reported as "Too many expansions".
+    """
+
+    h = heuristic(destination_coord, destination_coord)
+    if not isinstance(h, int):
+        return (False, "Heuristic function must always return an integer", 0, 0)
+    if h != 0:
+        return (False, "Heuristic from the destination to the destination must be zero", 0, 0)
+
+    h = heuristic(origin_coord, destination_coord)
+    if not isinstance(h, int) or h < 0:
+        print("Your heuristic from", origin_coord, "to", destination_coord, "is", h, "which is not a non-negative integer")
+        return (False, "Heuristic must be a non-negative integer", 0, 0)
+    if origin_coord == destination_coord:
+        return (True, "Correct", 0, 0)
+    origin_h = h
+    directions = graph.directions
+    expansions = 0
+    bounds = OrderedDict()
+
+    def remember(table, coord, value):
+        table[coord] = value
+        table.move_to_end(coord)
+        if len(table) > table_size:
+            table.popitem(last=False)
+
+    def lower(frame, value):
+        """ Decrease the lower bound of a vertex on the stack to a given value. """
+        if frame[3] is None or value < frame[3]:
+            frame[3] = value
+
+    bound = origin_h
+    while True:
+        # The current path is a stack of lists [coordinates, heuristic, index of the next direction, lower bound];
+        # the distance of a vertex is its depth and the lower bound is the smallest bound on the distance to the destination
+        # over neighbours searched so far, or None.
+        stack = [ [origin_coord, origin_h, 0, None] ]
+        table = OrderedDict({ origin_coord: 0 })
+        expansions += 1
+
+        while stack:
+            if expansions > IDA_EXPANDED_LIMIT:
+                print("IDA* exceeded", IDA_EXPANDED_LIMIT, "expansions while its memory stayed bounded; use A* for this test.")
+                return (False, "Too many expansions", 0, 0)
+
+            frame = stack[-1]
+            coord, h = frame[0], frame[1]
+            distance = len(stack)
+            descend = False
+            while frame[2] < len(directions):
+                visit_coord = tuple(a+b for (a,b) in zip(coord, directions[frame[2]]))
+                frame[2] += 1
+                if not graph.oracle(coord, visit_coord):
+                    continue
+
+                visit_h = heuristic(visit_coord, destination_coord)
+                if not isinstance(visit_h, int) or visit_h < 0:
+                    print("Your heuristic from", visit_coord, "to", destination_coord, "is", visit_h, "which is not a non-negative integer")
+                    return (False, "Heuristic function must always return a non-negative integer", 0, 0)
+                if h > visit_h + 1:
+                    print("Your heuristic from", coord, "to", destination_coord, "is", h,
+                        "and heuristic from", visit_coord, "to", destination_coord, "is", visit_h,
+                        "which fails the monotonic property since the distance between", coord, "and", visit_coord, "is 1.")
+                    return (False, "Heuristic must be monotonic", 0, 0)
+
+                # Neighbours which are cut off or were reached by a shorter path are not searched, so their estimates bound the vertex.
+                estimate = max(visit_h, bounds.get(visit_coord, 0))
+                seen = table.get(visit_coord)
+                if distance + estimate > bound or (seen is not None and seen <= distance):
+                    lower(frame, estimate + 1)
+                    continue
+                remember(table, visit_coord, distance)
+
+                if visit_coord == destination_coord:
+                    vertex = origin = Vertex(origin_coord, 0, origin_h, None)
+                    for d, (coord, h, _, _) in enumerate(stack[1:]):
+                        vertex = Vertex(coord, d+1, h, vertex)
+                    vertex = Vertex(visit_coord, distance, visit_h, vertex)
+                    check_path(graph, origin, vertex)
+                    return (True, "Correct", distance, expansions)
+
+                stack.append([visit_coord, visit_h, 0, None])
+                expansions += 1
+                descend = True
+                break
+
+            if not descend:
+                # The subtree of the vertex is searched, so its lower bound replaces its estimate in the bound of the predecessor.
+                # A vertex without neighbours has no lower bound since the destination is unreachable from it.
+                stack.pop()
+                lower_bound = frame[3]
+                if lower_bound is not None:
+                    lower_bound = max(lower_bound, h)
+                    remember(bounds, coord, lower_bound)
+                    if stack:
+                        lower(stack[-1], lower_bound + 1)
+
+        assert frame[3] is not None, "A path exists in all tests"
+        bound = max(bound + 1, frame[3])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import argparse
+import resource
+import multiprocessing
+from functools import partial
+from prettytable import PrettyTable
+from time import time
+
+from informed_search import informed_search, bidirectional_informed_search, ida_star_search
+from informed_search_tests import datasets
+
+# Compared configurations of the search; every one has the same interface as informed_search.
+configurations = {
+    "heap": partial(informed_search, frontier="heap"),
+    "bucket": partial(informed_search, frontier="bucket"),
+    "bidirectional": bidirectional_informed_search,
+    "ida": ida_star_search,
+}
+
+def run_case(search, graph, heuristic, origin, destination, connection):
+    """
+    Run a single search in a child process and send a tuple (result of the search, running time, peak memory in KiB) back.
+    The child inherits the peak RSS of the benchmark, so the peak memory is the growth of the peak RSS during the search.
+    """
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time()
+    result = search(graph, heuristic, origin, destination)
+    running_time = time() - start_time
+    connection.send((result, running_time, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss))
+    connection.close()
+
+def benchmark_case(search, graph, heuristic, origin, destination, expected_distance):
+    """
+    Run a single test in a new process and return a quadruple (evaluation, running time, number of visited vertices, peak memory in KiB).
+    Every test gets a new process, so the peak memory of one configuration is not hidden by a larger peak of a previous one.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_case, args=(search, graph, heuristic, origin, destination, sender))
+    process.start()
+    sender.close()
+    try:
+        (status, msg, found_distance, visited), running_time, memory = receiver.recv()
+    except EOFError:
+        process.join()
+        return ("Search process failed with exit code {}".format(process.exitcode), 0.0, 0, 0)
+    process.join()
+    if status and found_distance != expected_distance:
+        status, msg = False, "Found distance {} but {} is expected".format(found_distance, expected_distance)
+    return (msg, running_time, visited, memory)
+
+def benchmark(tests, names, compared):
+    """ Run all tests of given datasets using all compared configurations and return a PrettyTable with results. """
+    columns = ["Test name", "Origin", "Destination", "Distance"]
+    for c in compared:
+        columns += [c + " time [s]", c + " visited", c + " memory [MiB]"]
+    columns += ["Speedup", "Evaluation"]
+    results = PrettyTable(columns)
+
+    for name in names:
+        dataset, _, _ = tests[name]
+        for graph, heuristic, origin, destination, expected_distance in dataset:
+            print("Running test", name, "from", origin, "to", destination)
+            row = [name, origin, destination, expected_distance]
+            times = []
+            evaluation = "Correct"
+            for c in compared:
+                msg, running_time, visited, memory = benchmark_case(configurations[c], graph, heuristic, origin, destination, expected_distance)
+                row += ["{:.3f}".format(running_time), visited, "{:.1f}".format(memory / 1024)]
+                times.append(running_time)
+                if msg != "Correct":
+                    evaluation = "{}: {}".format(c, msg)
+            # Speedup of the last configuration compared to the first one.
+            row += ["{:.2f}".format(times[0] / times[-1]) if times[-1] > 0 else "-", evaluation]
+            results.add_row(row)
+    return results
+
+def main():
+    tests = datasets()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help="Datasets to be benchmarked; all datasets by default")
+    parser.add_argument("--compare", nargs="+", choices=configurations, default=["heap", "bucket"], help="Compared configurations")
+    args = parser.parse_args()
+
+    for name in args.names:
+        if not name in tests:
+            print("Unknown test", name)
+            return
+    print(benchmark(tests, args.names or list(tests), args.compare))
+
+"""
+To compare the heap and the bucket queue on all datasets, run the command
+$ python3 informed_search_benchmark.py
+
+Both frontiers pop vertices by priority and then by the largest distance, but they order vertices of equal priority and distance
+differently: the bucket queue pops them in the order of insertion and the heap in the order given by its structure.
+Numbers of visited vertices of both frontiers may therefore differ, mainly on grids with large plateaus of equal priority.
+
+Every configuration of every test runs in a new process, and the memory column is the growth of the peak RSS of the process during the search.
+
+To benchmark only datasets NAME1 NAME2, run the command
+$ python3 informed_search_benchmark.py NAME1 NAME2
+
+The bidirectional A* visits fewer vertices than A* only on small tests of GridRook2D and GridGreatKing2D
+and up to twice as many on large random subgraphs, so it is only a baseline.
+To compare A* with the bidirectional A* on the 3D grids, run the command
+$ python3 informed_search_benchmark.py Grid3D GridFaceDiagonal3D GridAllDiagonal3D --compare heap bidirectional
+
+To compare A* with the iterative-deepening A* on grids with many directions, run the command
+$ python3 informed_search_benchmark.py GridRook2D GridGreatKing2D --compare heap ida
+"""
+if __name__ == "__main__":
+    main()
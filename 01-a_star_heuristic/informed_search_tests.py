@@ -1,44 +1,134 @@
 #!/usr/bin/env python3
 
 import sys
+import argparse
+from functools import partial
 sys.path.append("..")
 import check_versions
 from prettytable import PrettyTable
 from time import time
+from concurrent.futures import ProcessPoolExecutor
 
-from heuristics import grid_2D_heuristic, grid_diagonal_2D_heuristic, grid_3D_heuristic, grid_face_diagonal_3D_heuristic, grid_all_diagonal_3D_heuristic, grid_great_king_2D_heuristic, grid_rook_2D_heuristic, grid_jumper_2D_heuristic
+from heuristics import grid_2D_heuristic, grid_diagonal_2D_heuristic, grid_3D_heuristic, grid_face_diagonal_3D_heuristic, grid_all_diagonal_3D_heuristic, grid_rook_2D_heuristic
+from heuristics import grid_great_king_2D_exact_heuristic, grid_jumper_2D_exact_heuristic
 from graphs import Grid2D, GridDiagonal2D, GridGreatKing2D, GridRook2D, GridJumper2D, Grid3D, GridFaceDiagonal3D, GridAllDiagonal3D
-from informed_search import informed_search
+from informed_search import informed_search, compact_informed_search, ida_star_search, SearchStats
 
-def informed_search_test(graph, heuristic, origin, destination, expected_distance):
-    """ Run a single test of A* algorithm.
+search_algorithms = {
+    "astar": informed_search,
+    "compact": compact_informed_search,
+    "bucket": partial(informed_search, frontier="bucket"),
+    "ida": ida_star_search,
+}
+
+# Search algorithms which accept the argument stats of informed_search.
+profiled_algorithms = {"astar", "bucket"}
+
+def informed_search_test(graph, heuristic, origin, destination, expected_distance, search=informed_search):
+    """ Run a single test of A* algorithm and return a pair (status, message). See informed_search_case. """
+    status, msg, _ = informed_search_case(graph, heuristic, origin, destination, expected_distance, search)
+    return (status, msg)
+
+def informed_search_case(graph, heuristic, origin, destination, expected_distance, search=informed_search):
+    """ Run a single test of A* algorithm and return a triple (status, message, number of visited vertices).
     graph -- an instance of a Grid
     heuristic -- a function estimating distance between two vertices
     origin -- a starting point of a path
     destination -- a terminal point of a path
     expected_distance -- the expected length of a shortest path
+    search -- a search algorithm with the same interface as informed_search
     """
-    status,msg,found_distance,visited = informed_search(graph, heuristic, origin, destination)
+    status,msg,found_distance,visited = search(graph, heuristic, origin, destination)
     if not status:
-        return (status, msg)
+        return (status, msg, visited)
     if found_distance > expected_distance:
         # In this case, A* is confused by heuristic which is probably non-monotonic.
-        return (False, "The path your heuristic found is longer than a shortest path")
+        return (False, "The path your heuristic found is longer than a shortest path", visited)
     if found_distance < expected_distance:
         # This case is expected not to happen. This most likely means incorrect setting of tests.
-        return (False, "Your heuristic found a shorter path than the optimal which should be impossible")
+        return (False, "Your heuristic found a shorter path than the optimal which should be impossible", visited)
     print("Your heuristic found a path from", origin, "to", destination, "of length", found_distance, "and visited", visited, "vertices. Your heuristic estimates that the distance is", heuristic(origin, destination))
-    return (status, msg)
+    if graph.cache is not None:
+        print("Neighbour cache:", graph.cache_hits, "hits and", graph.cache_misses, "misses")
+    return (status, msg, visited)
+
+def timed_informed_search_case(case):
+    """ Run a single test given as a tuple of arguments of informed_search_case and return (status, message, visited, running time). """
+    start_time = time()
+    status, msg, visited = informed_search_case(*case)
+    return (status, msg, visited, time() - start_time)
 
-def informed_search_dataset(dataset):
+def informed_search_dataset(dataset, search=informed_search):
     """ Run a set of tests """
     for d in dataset:
-        status, msg = informed_search_test(*d)
+        status, msg = informed_search_test(*d, search=search)
         if not status:
             return (status, msg)
     return (True, "Correct")
 
-def main():
+def informed_search_parallel(tests, names, search, jobs):
+    """
+    Run all tests of given datasets in a pool of jobs processes.
+    Return a PrettyTable of datasets in the same format as the sequential run and a PrettyTable of all tests.
+    The time of a dataset is the sum of running times of its tests.
+    """
+    cases = [ (name, d) for name in names for d in tests[name][0] ]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        outcomes = list(pool.map(timed_informed_search_case, [ (*d, search) for _, d in cases ]))
+
+    results = PrettyTable(["Test name", "Points", "Your time [s]", "Time limit on recodex [s]", "Evaluation"])
+    details = PrettyTable(["Test name", "Origin", "Destination", "Time [s]", "Visited", "Vertices per second", "Evaluation"])
+    for name in names:
+        _, points, time_limit = tests[name]
+        running_time = 0
+        msg = "Correct"
+        for (case_name, d), (status, case_msg, visited, case_time) in zip(cases, outcomes):
+            if case_name != name:
+                continue
+            running_time += case_time
+            if not status and msg == "Correct":
+                msg = case_msg
+            _, _, origin, destination, _ = d
+            details.add_row([name, origin, destination, "{:.3f}".format(case_time), visited, "{:.0f}".format(visited / case_time) if case_time > 0 else "-", case_msg])
+        results.add_row([name, points, running_time, time_limit, msg])
+    return results, details
+
+def trace_callback(period):
+    """ Return a callback of SearchStats printing the state of the search after every period expansions. """
+    def callback(stats, vertex):
+        if stats.expanded % period == 0:
+            print("Expanded", stats.expanded, "vertices, generated", stats.generated, "neighbours; the last explored vertex is", vertex.coord,
+                "at distance", vertex.distance, "with heuristic", vertex.heuristic)
+    return callback
+
+def informed_search_profile(tests, names, search, trace=0):
+    """
+    Run all tests of given datasets collecting SearchStats of every test.
+    Return a PrettyTable of datasets in the same format as the sequential run and a PrettyTable of statistics of all tests.
+    trace -- if positive, the search is traced after every given number of expansions
+    """
+    results = PrettyTable(["Test name", "Points", "Your time [s]", "Time limit on recodex [s]", "Evaluation"])
+    profile = PrettyTable(["Test name", "Origin", "Destination", "Expanded", "Generated", "Reopened", "Heap peak",
+        "Heuristic [s]", "Neighbours [s]", "Queue [s]", "Other [s]", "Evaluation"])
+    for name in names:
+        print("Running test", name)
+        dataset, points, time_limit = tests[name]
+        running_time = 0
+        msg = "Correct"
+        for d in dataset:
+            _, _, origin, destination, _ = d
+            stats = SearchStats(trace_callback(trace) if trace > 0 else None)
+            status, case_msg, _ = informed_search_case(*d, partial(search, stats=stats))
+            running_time += stats.total_time
+            if not status and msg == "Correct":
+                msg = case_msg
+            profile.add_row([name, origin, destination, stats.expanded, stats.generated, stats.reopened, stats.heap_peak]
+                + [ "{:.3f}".format(stats.times[phase]) for phase in SearchStats.PHASES ] + ["{:.3f}".format(stats.other_time()), case_msg])
+        results.add_row([name, points, running_time, time_limit, msg])
+    return results, profile
+
+def datasets():
+    """ Return a dictionary of all datasets; every dataset is a triple (list of tests, points, time limit). """
     grid_2D_tests = [
         (Grid2D(42,0.9), grid_2D_heuristic, (0,0), (3,3), 6),
         (Grid2D(3240,0.8), grid_2D_heuristic, (1,2), (21,26), 44),
@@ -54,11 +144,11 @@ def main():
         (GridDiagonal2D(565,1), grid_diagonal_2D_heuristic, (-76457,-36498), (47647,28745), 124104)
     ]
     grid_great_king_2D_tests = [
-        (GridGreatKing2D(42,0.9), grid_great_king_2D_heuristic, (0,0), (3,3), 1),
-        (GridGreatKing2D(16424,0.8), grid_great_king_2D_heuristic, (1,2), (21,26), 3),
-        (GridGreatKing2D(1234,0.7), grid_great_king_2D_heuristic, (-5,3), (112,147), 18),
-        (GridGreatKing2D(45645,0.4), grid_great_king_2D_heuristic, (-248,-398), (147,145), 68),
-        (GridGreatKing2D(565,1), grid_great_king_2D_heuristic, (-6457,-6498), (7647,8745), 1906),
+        (GridGreatKing2D(42,0.9), grid_great_king_2D_exact_heuristic, (0,0), (3,3), 1),
+        (GridGreatKing2D(16424,0.8), grid_great_king_2D_exact_heuristic, (1,2), (21,26), 3),
+        (GridGreatKing2D(1234,0.7), grid_great_king_2D_exact_heuristic, (-5,3), (112,147), 18),
+        (GridGreatKing2D(45645,0.4), grid_great_king_2D_exact_heuristic, (-248,-398), (147,145), 68),
+        (GridGreatKing2D(565,1), grid_great_king_2D_exact_heuristic, (-6457,-6498), (7647,8745), 1906),
     ]    
     grid_rook_2D_tests = [
         (GridRook2D(42,0.9), grid_rook_2D_heuristic, (0,0), (3,3), 2),
@@ -68,16 +158,16 @@ def main():
         (GridRook2D(55,1), grid_rook_2D_heuristic, (-4787,-6498), (3488,9751), 3067),
     ]
     grid_jumper_2D_tests_1 = [
-        (GridJumper2D(42,0.9), grid_jumper_2D_heuristic, (0,0), (3,2), 1),
-        (GridJumper2D(45,0.8), grid_jumper_2D_heuristic, (4,7), (14,16), 7),
-        (GridJumper2D(4,0.7), grid_jumper_2D_heuristic, (-5,-3), (172,174), 74),
-        (GridJumper2D(44,0.6), grid_jumper_2D_heuristic, (-212,-378), (117,275), 224),
-        (GridJumper2D(55,1), grid_jumper_2D_heuristic, (-2457,-7498), (3478,1751), 3084),
+        (GridJumper2D(42,0.9), grid_jumper_2D_exact_heuristic, (0,0), (3,2), 1),
+        (GridJumper2D(45,0.8), grid_jumper_2D_exact_heuristic, (4,7), (14,16), 7),
+        (GridJumper2D(4,0.7), grid_jumper_2D_exact_heuristic, (-5,-3), (172,174), 74),
+        (GridJumper2D(44,0.6), grid_jumper_2D_exact_heuristic, (-212,-378), (117,275), 224),
+        (GridJumper2D(55,1), grid_jumper_2D_exact_heuristic, (-2457,-7498), (3478,1751), 3084),
     ]
     grid_jumper_2D_tests_2 = [
-        (GridJumper2D(42,0.9), grid_jumper_2D_heuristic, (0,0), (3,2), 1),
-        (GridJumper2D(114,1), grid_jumper_2D_heuristic, (-8441,-9498), (7878,8745), 6914),
-        (GridJumper2D(475,1), grid_jumper_2D_heuristic, (-16441,-19498), (11158,15745), 12570),
+        (GridJumper2D(42,0.9), grid_jumper_2D_exact_heuristic, (0,0), (3,2), 1),
+        (GridJumper2D(114,1), grid_jumper_2D_exact_heuristic, (-8441,-9498), (7878,8745), 6914),
+        (GridJumper2D(475,1), grid_jumper_2D_exact_heuristic, (-16441,-19498), (11158,15745), 12570),
     ]
     grid_3D_tests = [
         (Grid3D(42,0.9), grid_3D_heuristic, (0,0,0), (3,3,3), 9),
@@ -117,24 +207,60 @@ def main():
             "GridJumper2D-1": (grid_jumper_2D_tests_1, 1, 60),
             "GridJumper2D-2": (grid_jumper_2D_tests_2, 2, 60)
     }
+    return tests
+
+def main():
+    tests = datasets()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", nargs="?", help="Run only the test of a given name")
+    parser.add_argument("--search", choices=search_algorithms, default="astar", help="Search algorithm to be tested; ida saves memory but is much slower than astar on large tests")
+    parser.add_argument("--cache", type=int, default=0, help="Capacity of the neighbour cache of every grid; disabled by default")
+    parser.add_argument("--jobs", type=int, default=0, help="Run every test in a pool of a given number of processes")
+    parser.add_argument("--profile", action="store_true", help="Print statistics of every test; supported by " + ", ".join(sorted(profiled_algorithms)))
+    parser.add_argument("--trace", type=int, default=0, help="With --profile, print the state of the search after every given number of expansions")
+    args = parser.parse_args()
+    search = search_algorithms[args.search]
+    for dataset, _, _ in tests.values():
+        for graph, *_ in dataset:
+            graph.enable_cache(args.cache)
 
-    if len(sys.argv) == 1:
+    if args.profile:
+        if not args.search in profiled_algorithms:
+            print("Search", args.search, "cannot be profiled")
+            return
+        if args.name is not None and not args.name in tests:
+            print("Unknown test", args.name)
+            return
+        names = list(tests) if args.name is None else [args.name]
+        results, profile = informed_search_profile(tests, names, search, args.trace)
+        print(profile)
+        print(results)
+    elif args.jobs > 0:
+        if args.name is not None and not args.name in tests:
+            print("Unknown test", args.name)
+            return
+        names = list(tests) if args.name is None else [args.name]
+        results, details = informed_search_parallel(tests, names, search, args.jobs)
+        print(details)
+        print(results)
+    elif args.name is None:
         results = PrettyTable(["Test name", "Points", "Your time [s]", "Time limit on recodex [s]", "Evaluation"])
         for name in tests:
             print("Running test", name)
             dataset, points, time_limit = tests[name]
             start_time = time()
-            status, msg = informed_search_dataset(dataset)
+            status, msg = informed_search_dataset(dataset, search)
             running_time = time() - start_time
             print(msg)
             print()
             results.add_row([name, points, running_time, time_limit, msg])
         print(results)
     else:
-        name = sys.argv[1]
+        name = args.name
         if name in tests:
             dataset, points, time_limit = tests[name]
-            status, msg = informed_search_dataset(dataset)
+            status, msg = informed_search_dataset(dataset, search)
             print(msg)
         else:
             print("Unknown test", name)
@@ -145,6 +271,22 @@ $ python3 informed_search_tests.py
 
 To run a test NAME, run the command
 $ python3 informed_search_tests.py NAME
+
+To run tests using the iterative-deepening A* which stores only the current path and a bounded transposition table, add the option;
+the numbers of visited vertices are numbers of expansions in all iterations and large tests take much longer than with A*
+$ python3 informed_search_tests.py --search ida
+
+To cache neighbours of at most N recently explored vertices of every grid, add the option
+$ python3 informed_search_tests.py --cache N
+
+To run every test in a pool of N processes, add the option
+$ python3 informed_search_tests.py --jobs N
+
+To print numbers of expanded, generated and reopened vertices, the peak size of the heap and times of phases of every test, add the option
+$ python3 informed_search_tests.py --profile
+
+To print also the state of the search after every N expansions, add the options
+$ python3 informed_search_tests.py --profile --trace N
 """
 if __name__ == "__main__":
     main()
@@ -1,13 +1,18 @@
 import sys
+import numpy
 from heuristics import grid_2D_heuristic, grid_diagonal_2D_heuristic, grid_3D_heuristic, grid_face_diagonal_3D_heuristic, grid_all_diagonal_3D_heuristic, grid_great_king_2D_heuristic, grid_rook_2D_heuristic, grid_jumper_2D_heuristic
+from heuristics import grid_jumper_2D_exact_heuristic, grid_great_king_2D_exact_heuristic
+from heuristics import grid_2D_heuristic_vectorized, grid_diagonal_2D_heuristic_vectorized, grid_3D_heuristic_vectorized, grid_face_diagonal_3D_heuristic_vectorized, grid_all_diagonal_3D_heuristic_vectorized, grid_great_king_2D_heuristic_vectorized, grid_rook_2D_heuristic_vectorized, grid_jumper_2D_heuristic_vectorized
 from graphs import Grid2D, GridDiagonal2D, GridGreatKing2D, GridRook2D, GridJumper2D, Grid3D, GridFaceDiagonal3D, GridAllDiagonal3D
 
-def evaluate(graph, size, heuristic):
+def evaluate(graph, size, heuristic, vectorized_heuristic=None):
     """
         Run tests to verify the monotonicity of a given heuristic function.
         graph: A grid derived from Grid.
         size: Tested are all position 
         heuristic: A heuristic function to be tested for monotonicity.
+        vectorized_heuristic: An optional version of the heuristic computing values for an array of positions; see evaluate_vectorized.
+            It is first compared with the heuristic, see matches_heuristic, so the monotonicity is verified for the heuristic itself.
         Return True if all tests pass.
 
         Warning: For simplicity, the function assumes that vertices are two or tree dimensional coordinates.
@@ -21,6 +26,11 @@ def evaluate(graph, size, heuristic):
         print("Heuristic from the destination to the destination must be zero")
         return False
 
+    if vectorized_heuristic is not None:
+        if not matches_heuristic(graph, size, heuristic, vectorized_heuristic, destination):
+            return False
+        return evaluate_vectorized(graph, size, vectorized_heuristic, destination)
+
     rectangle = [ range(-size,size) if i < graph.dimension else range(1) for i in range(3) ]
     for a in rectangle[0]:
         for b in rectangle[1]:
@@ -44,16 +54,84 @@ def evaluate(graph, size, heuristic):
     print("Passed.")
     return True
 
+def matches_heuristic(graph, size, heuristic, vectorized_heuristic, destination):
+    """
+        Verify that the vectorized heuristic equals the heuristic on all positions tested by evaluate and their neighbours,
+        i.e. on the box enlarged by the longest step of the grid, and that the heuristic returns integers there.
+        Report the first mismatch in the same order as evaluate.
+    """
+    step = max(max(abs(a) for a in d) for d in graph.directions)
+    axes = [ numpy.arange(-size - step, size + step) for _ in range(graph.dimension) ]
+    positions = numpy.stack(numpy.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, graph.dimension)
+    values = numpy.asarray(vectorized_heuristic(positions, destination)).tolist()
+    for position, value in zip(positions.tolist(), values):
+        position = tuple(position)
+        h = heuristic(position, destination)
+        if not isinstance(h, int):
+            print("Your heuristic from", position, "to", destination, "is", h, "which is not an integer")
+            return False
+        if h != value:
+            print("Your heuristic from", position, "to", destination, "is", h, "but its vectorized version returns", value)
+            return False
+    return True
+
+def evaluate_vectorized(graph, size, heuristic, destination, chunk=4096):
+    """
+        Verify the monotonicity of a vectorized heuristic on all edges of the same box as evaluate using NumPy arrays.
+        heuristic: A function receiving an integer array of shape (n, dimension) of positions and the destination
+            and returning an integer array of n values.
+        Positions are processed in chunks of a given size and the first violation is reported in the same order as in evaluate.
+    """
+    axes = [ numpy.arange(-size, size) for _ in range(graph.dimension) ]
+    positions = numpy.stack(numpy.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, graph.dimension)
+
+    for start in range(0, len(positions), chunk):
+        origins = positions[start:start+chunk]
+        heuristic_origins = numpy.asarray(heuristic(origins, destination))
+        neighbours, edges = graph.neighbours_batch(origins)
+        heuristic_neighbours = numpy.asarray(heuristic(neighbours.reshape(-1, graph.dimension), destination)).reshape(edges.shape)
+        if heuristic_origins.dtype.kind not in "iu" or heuristic_neighbours.dtype.kind not in "iu":
+            print("Heuristic function must always return an integer")
+            return False
+
+        # For every position and every direction, decide whether the edge fails the test.
+        failed = edges & ((heuristic_neighbours < 0) | (heuristic_origins[:,None] > 1 + heuristic_neighbours))
+        failed_origins = (heuristic_origins < 0) | failed.any(axis=1)
+        if not failed_origins.any():
+            continue
+
+        i = int(numpy.argmax(failed_origins))
+        origin = tuple(int(a) for a in origins[i])
+        heuristic_origin = int(heuristic_origins[i])
+        if heuristic_origin < 0:
+            print("Your heuristic from", origin, "to", destination, "is", heuristic_origin, "which is not a non-negative integer")
+            return False
+        j = int(numpy.argmax(failed[i]))
+        neighbour = tuple(int(a) for a in neighbours[i,j])
+        heuristic_neighbour = int(heuristic_neighbours[i,j])
+        if heuristic_neighbour < 0:
+            print("Your heuristic from", neighbour, "to", destination, "is", heuristic_neighbour, "which is not a non-negative integer")
+            return False
+        print("Your heuristic from", origin, "to", destination, "is", heuristic_origin,
+        "and heuristic from", neighbour, "to", destination, "is", heuristic_neighbour,
+        "which fails the monotonic property since the distance between", origin, "and", neighbour, "is 1.")
+        return False
+
+    print("Passed.")
+    return True
+
 def main():
     tests = {
-        "Grid2D": (Grid2D(1,1.), 100, grid_2D_heuristic),
-        "GridDiagonal2D": (GridDiagonal2D(1,1.), 100, grid_diagonal_2D_heuristic),
-        "GridGreatKing2D": (GridGreatKing2D(1,1.), 50, grid_great_king_2D_heuristic),
-        "GridRook2D": (GridRook2D(1,1.), 100, grid_rook_2D_heuristic),
-        "GridJumper2D": (GridJumper2D(1,1.), 100, grid_jumper_2D_heuristic),
-        "Grid3D": (Grid3D(1,1.), 10, grid_3D_heuristic),
-        "GridFaceDiagonal3D": (GridFaceDiagonal3D(1,1.), 10, grid_face_diagonal_3D_heuristic),
-        "GridAllDiagonal3D": (GridAllDiagonal3D(1,1.), 10, grid_all_diagonal_3D_heuristic),
+        "Grid2D": (Grid2D(1,1.), 100, grid_2D_heuristic, grid_2D_heuristic_vectorized),
+        "GridDiagonal2D": (GridDiagonal2D(1,1.), 100, grid_diagonal_2D_heuristic, grid_diagonal_2D_heuristic_vectorized),
+        "GridGreatKing2D": (GridGreatKing2D(1,1.), 50, grid_great_king_2D_heuristic, grid_great_king_2D_heuristic_vectorized),
+        "GridRook2D": (GridRook2D(1,1.), 100, grid_rook_2D_heuristic, grid_rook_2D_heuristic_vectorized),
+        "GridJumper2D": (GridJumper2D(1,1.), 100, grid_jumper_2D_heuristic, grid_jumper_2D_heuristic_vectorized),
+        "Grid3D": (Grid3D(1,1.), 10, grid_3D_heuristic, grid_3D_heuristic_vectorized),
+        "GridFaceDiagonal3D": (GridFaceDiagonal3D(1,1.), 10, grid_face_diagonal_3D_heuristic, grid_face_diagonal_3D_heuristic_vectorized),
+        "GridAllDiagonal3D": (GridAllDiagonal3D(1,1.), 10, grid_all_diagonal_3D_heuristic, grid_all_diagonal_3D_heuristic_vectorized),
+        "GridGreatKing2D-exact": (GridGreatKing2D(1,1.), 50, grid_great_king_2D_exact_heuristic),
+        "GridJumper2D-exact": (GridJumper2D(1,1.), 100, grid_jumper_2D_exact_heuristic),
 }
 
     if len(sys.argv) == 1:
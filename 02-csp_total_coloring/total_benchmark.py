@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path.append("..")
+
+import total_csp
+from total_benchmark_common import argument_parser, run_benchmark
+
+def problem_size(graph):
+    """
+        Return a pair (variables, constraints) of the problem of the whole graph: variables are vertices and edges
+        and constraints are pairs of conflicting variables posted by TotalColoringConstraint.
+        The solver may solve smaller problems, e.g. pieces of a decomposed graph, or none if total_bounds settles the graph.
+    """
+    degrees = [ graph.degree[v] for v in graph.nodes ]
+    elements = graph.number_of_nodes() + graph.number_of_edges()
+    return elements, sum(d * (d + 1) // 2 for d in degrees) + graph.number_of_edges()
+
+def main():
+    args = argument_parser().parse_args()
+    options = { "symmetry": args.symmetry, "bounds": args.bounds, "decompose": args.decompose }
+    size_columns = { "whole_graph_variables": "Variables (whole graph)", "whole_graph_constraints": "Constraints (whole graph)" }
+    run_benchmark(args, "csp", total_csp.total_coloring, options, problem_size, size_columns)
+
+"""
+To benchmark the CSP solver on all families of graphs, run the command
+$ python3 total_benchmark.py
+
+To benchmark hypercubes of dimensions 3 to 7 and save results into a CSV file, run the command
+$ python3 total_benchmark.py hypercube --sizes 3 4 5 6 7 --output hypercube.csv
+
+To measure five random 4-regular graphs of every size three times each with a time limit of 10 seconds, run the command
+$ python3 total_benchmark.py regular --degree 4 --graphs 5 --repeat 3 --timeout 10 --output regular.json
+
+To benchmark the solver without total_bounds, decomposition or symmetry breaking, add the options
+$ python3 total_benchmark.py --no-bounds --no-decompose --no-symmetry
+
+The SAT solver is benchmarked by 03-sat_total_coloring/total_benchmark.py on the same graphs for the same options.
+"""
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,149 @@
 import constraint
+from total_common import symmetry_breaking, total_bounds, assign_coloring, decomposed_total_coloring
+from functools import partial
 
-def total_coloring(graph):
+
+class TotalColoringConstraint(constraint.Constraint):
+    """
+        Constraint that every pair of adjacent elements of the total graph has different values.
+        It replaces AllDifferentConstraint of every vertex star and of every edge with its endpoints,
+        and every conflicting pair is stored once even if it appears in several of these sets.
+        It works with any solver of python-constraint but TotalColoringSolver propagates it directly.
+    """
+
+    def __init__(self, pairs):
+        """ pairs - iterable of pairs of variables which must have different values """
+        self.neighbours = {}
+        for x, y in pairs:
+            if x != y:
+                self.neighbours.setdefault(x, set()).add(y)
+                self.neighbours.setdefault(y, set()).add(x)
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        for x, value in assignments.items():
+            for y in self.neighbours.get(x, ()):
+                if y not in assignments:
+                    if forwardcheck and value in domains[y]:
+                        domains[y].hideValue(value)
+                        if not domains[y]:
+                            return False
+                elif assignments[y] == value:
+                    return False
+        return True
+
+
+class TotalColoringSolver(constraint.Solver):
+    """
+        Backtracking solver with forward checking and the DSATUR order of variables:
+        the next variable has the smallest number of remaining values and ties are broken by the largest number of neighbours.
+        Neighbours are given by instances of TotalColoringConstraint whose assigned values are removed from domains of neighbours;
+        all other constraints are only checked when all their variables are assigned.
+        If all domains with more than one value are equal, the values which are not assigned yet are interchangeable,
+        so getSolution tries only the first of them.
+    """
+
+    def getSolution(self, domains, constraints, vconstraints):
+        return next(self.getSolutionIter(domains, constraints, vconstraints, interchangeable=True), None)
+
+    def getSolutions(self, domains, constraints, vconstraints):
+        return list(self.getSolutionIter(domains, constraints, vconstraints))
+
+    def getSolutionIter(self, domains, constraints, vconstraints, interchangeable=False):
+        neighbours = { x: set() for x in domains }
+        for con, variables in constraints:
+            if isinstance(con, TotalColoringConstraint):
+                for x in variables:
+                    neighbours[x].update(y for y in con.neighbours.get(x, ()) if y in domains)
+        others = { x: [ (con, variables) for con, variables in vconstraints[x] if not isinstance(con, TotalColoringConstraint) ] for x in domains }
+
+        # Values of variables with a single value are never interchangeable with other values.
+        wide = [ list(domains[x]) for x in domains if len(domains[x]) > 1 ]
+        fixed = set(domains[x][0] for x in domains if len(domains[x]) == 1)
+        interchangeable = interchangeable and all(d == wide[0] for d in wide) and not any(others.values())
+        current = { x: set(domains[x]) for x in domains }
+        unassigned = set(domains)
+        assignments = {}
+        used = {}
+        stack = []
+
+        def select():
+            x = min(unassigned, key=lambda x: (len(current[x]), -len(neighbours[x])))
+            values = [ value for value in domains[x] if value in current[x] ]
+            if interchangeable:
+                fresh = [ value for value in values if value not in used and value not in fixed ]
+                values = [ value for value in values if value in used or value in fixed ] + fresh[:1]
+            unassigned.remove(x)
+            stack.append([x, values[::-1], []])
+
+        def assign(frame):
+            x, values, removed = frame
+            value = values.pop()
+            assignments[x] = value
+            used[value] = used.get(value, 0) + 1
+            for y in neighbours[x]:
+                if y in unassigned and value in current[y]:
+                    current[y].remove(value)
+                    removed.append(y)
+                    if not current[y]:
+                        return False
+            for con, variables in others[x]:
+                if all(y in assignments for y in variables) and not con(variables, domains, assignments):
+                    return False
+            return True
+
+        def unassign(frame):
+            x, values, removed = frame
+            value = assignments.pop(x)
+            used[value] -= 1
+            if not used[value]:
+                del used[value]
+            for y in removed:
+                current[y].add(value)
+            removed.clear()
+
+        if not unassigned:
+            yield {}
+            return
+        select()
+        while stack:
+            frame = stack[-1]
+            if frame[0] in assignments:
+                unassign(frame)
+            if not frame[1]:
+                stack.pop()
+                unassigned.add(frame[0])
+                continue
+            if not assign(frame):
+                continue
+            if unassigned:
+                select()
+            else:
+                yield assignments.copy()
+
+
+def total_coloring(graph, symmetry=True, bounds=True, native=True, decompose=True, minimum=0, known_bounds=None):
     """
         Find total chromatic index and total coloring.
         graph - instance of networkx.Graph
+        symmetry - fix colors of a vertex of the maximum degree and its edges, see total_common.symmetry_breaking
+        bounds - compute bounds and a coloring by total_common.total_bounds, skip the solver if both bounds are equal
+            and otherwise search only numbers of colors from the lower bound to the upper bound minus one
+        native - post a single TotalColoringConstraint and solve it by TotalColoringSolver;
+            otherwise post AllDifferentConstraint for every vertex star and every edge and use the default solver
+        decompose - solve biconnected components in worker processes and merge their colorings, see total_common.decomposed_total_coloring
+        minimum - a number of colors which is acceptable anyway, so fewer than min(minimum, D+2) colors are not tried
+            and the returned number of colors may exceed x if it is at most minimum;
+            decomposed_total_coloring uses it for pieces of a graph which needs at least minimum colors anyway
+        known_bounds - a tuple returned by total_common.total_bounds for the graph which is used instead of computing it again;
+            decomposed_total_coloring passes bounds it has already computed
         returns - total chromatic index x
         Furthermore, assign property "color" for every vertex and edge. The value of the color has to be an integer between 0 and x-1.
 
-        TODO: The implementation of this function finds some total coloring but the number of colors may not be minimal.
-        Find the total chromatic index.
+        Numbers of colors are tried in increasing order from the lower bound, so the first solution uses the minimal number of colors.
     """
+    if decompose:
+        solve = partial(total_coloring, symmetry=symmetry, bounds=bounds, native=native, decompose=False)
+        return decomposed_total_coloring(graph, solve, bounds=bounds)
     
     ## Idea of values taken from here https://www.geeksforgeeks.org/python-assign-values-to-values-list/
     ## Some small concepts taken from here : https://towardsdatascience.com/graph-coloring-with-networkx-88c45f09b8f4
@@ -33,24 +167,56 @@ def total_coloring(graph):
         node1 += 1
     
     
+    # Variables of pinned vertices and edges get a single color.
+    pinned = {}
+    if symmetry:
+        node_colors, edge_colors = symmetry_breaking(graph)
+        for node, c in node_colors.items():
+            pinned[total_nodes[node]] = c
+        for edge, c in edge_colors.items():
+            pinned[total_edge[edge]] = c
+
+    minimum = min(minimum, max_deg + 2)
+    upper = None
+    if bounds:
+        lower, upper, bound_nodes, bound_edges = known_bounds or total_bounds(graph)
+        max_deg = lower - 1
+    max_deg = max(max_deg, minimum - 1)
+
     solution = False
 
+    # Every conflicting pair of the total graph is posted once: vertex and its incident edges, and endpoints of every edge.
+    if native:
+        pairs = set()
+        for u in graph.nodes:
+            star = [total_nodes[u]] + [total_edge[e] for e in graph.edges(u)]
+            pairs.update((x, y) for i, x in enumerate(star) for y in star[i + 1:])
+        for u, v in graph.edges:
+            pairs.add((total_nodes[u], total_nodes[v]))
+        total_constraint = TotalColoringConstraint(pairs)
+
     while not solution:
-        problem = constraint.Problem()
+        problem = constraint.Problem(TotalColoringSolver()) if native else constraint.Problem()
         max_deg += 1
+        if upper is not None and max_deg >= upper:
+            assign_coloring(graph, bound_nodes, bound_edges)
+            return upper
         domain = range(max_deg)
-        problem.addVariables(total_nodes.values(), domain)
-        problem.addVariables(set(total_edge.values()), domain)   #Variable Declaration for the edges and vertices
-
-        for node1 in total_nodes:
-            inci_edges = []
-            for edge in graph.edges(node1):
-             inci_edges.append(total_edge[edge])
-             
-            problem.addConstraint(constraint.AllDifferentConstraint(),[total_nodes[node1]]+inci_edges)#Constraint for the edges and their neighbors
-
-            for u in graph[node1]:
-                problem.addConstraint(constraint.AllDifferentConstraint(), [total_nodes[u],total_nodes[node1], total_edge[(node1, u)]])
+        for var in list(total_nodes.values()) + sorted(set(total_edge.values())):   #Variable Declaration for the edges and vertices
+            problem.addVariable(var, [pinned[var]] if var in pinned else domain)
+
+        if native:
+            problem.addConstraint(total_constraint)
+        else:
+            for node1 in total_nodes:
+                inci_edges = []
+                for edge in graph.edges(node1):
+                 inci_edges.append(total_edge[edge])
+                 
+                problem.addConstraint(constraint.AllDifferentConstraint(),[total_nodes[node1]]+inci_edges)#Constraint for the edges and their neighbors
+
+            for u, v in graph.edges():   #Every edge with its endpoints is posted once
+                problem.addConstraint(constraint.AllDifferentConstraint(), [total_nodes[u], total_nodes[v], total_edge[u, v]])
 
         solution = problem.getSolution()
 
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import sys
+import argparse
 sys.path.append("..")
 #import check_versions
 from prettytable import PrettyTable
 from time import time
 import networkx
 from total_csp import total_coloring
+from total_common import total_bounds, assign_coloring
 
 def verify_total_coloring(graph_original, graph_student, expected_colors, colors):
     if not isinstance(colors, int):
@@ -56,16 +58,35 @@ def verify_total_coloring(graph_original, graph_student, expected_colors, colors
 
     return (True, "Correct")
 
-def total_coloring_test(name, graph_original, expected_colors):
+def total_coloring_test(name, graph_original, expected_colors, symmetry=True, bounds=True, native=True, decompose=True):
     print("Tested graph:", name)
     graph_student = graph_original.copy()
-    colors = total_coloring(graph_student)
+    colors = total_coloring(graph_student, symmetry=symmetry, bounds=bounds, native=native, decompose=decompose)
     return verify_total_coloring(graph_original, graph_student, expected_colors, colors)
 
-def total_coloring_dataset(dataset):
+def total_bounds_test(name, graph_original):
+    """ Check that total_bounds settles a graph by a coloring with the number of colors found by the solver without bounds. """
+    print("Tested graph:", name)
+    lower, upper, node_colors, edge_colors = total_bounds(graph_original)
+    if lower != upper:
+        return (False, f"Bounds {lower} and {upper} of a graph with a closed form are not equal.")
+    expected_colors = total_coloring(graph_original.copy(), bounds=False, decompose=False)
+    graph_bounds = graph_original.copy()
+    assign_coloring(graph_bounds, node_colors, edge_colors)
+    return verify_total_coloring(graph_original, graph_bounds, expected_colors, upper)
+
+def total_bounds_dataset(dataset):
+    """ Run total_bounds_test for every pair (name, graph) of a dataset """
+    for d in dataset:
+        status, msg = total_bounds_test(*d)
+        if not status:
+            return (status, msg)
+    return (True, "Correct")
+
+def total_coloring_dataset(dataset, symmetry=True, bounds=True, native=True, decompose=True):
     """ Run a set of tests """
     for d in dataset:
-        status, msg = total_coloring_test(*d)
+        status, msg = total_coloring_test(*d, symmetry=symmetry, bounds=bounds, native=native, decompose=decompose)
         if not status:
             return (status, msg)
     return (True, "Correct")
@@ -91,28 +112,46 @@ def main():
         ("Les Miserables", networkx.les_miserables_graph(), 37)
     ]
 
+    # Graphs whose total chromatic index is given by a closed form or a greedy coloring of total_bounds.
+    closed_form_graphs = [ (f"Complete graph on {n} vertices", networkx.complete_graph(n)) for n in range(1, 8) ]
+    closed_form_graphs += [ (f"Complete bipartite graph on {a}+{b} vertices", networkx.complete_bipartite_graph(a, b)) for a in range(1, 4) for b in range(a, 5) ]
+    closed_form_graphs += [ (f"Cycle of length {n}", networkx.cycle_graph(n)) for n in range(3, 11) ]
+    closed_form_graphs += [ (f"Path on {n} vertices", networkx.path_graph(n)) for n in range(2, 9) ]
+
     tests = {
             "small": (small_graphs, 5, 60),
             "large": (large_graphs, 5, 60)
     }
 
-    if len(sys.argv) == 1:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", nargs="?", help="Run only the test of a given name")
+    parser.add_argument("--check-bounds", action="store_true", help="Compare colorings of total_bounds for complete graphs, complete bipartite graphs, cycles and paths with the solver without bounds")
+    parser.add_argument("--no-symmetry", dest="symmetry", action="store_false", help="Do not fix colors of a vertex of the maximum degree and its edges")
+    parser.add_argument("--no-bounds", dest="bounds", action="store_false", help="Always run the solver from D+1 colors without total_bounds")
+    parser.add_argument("--no-native", dest="native", action="store_false", help="Post AllDifferentConstraint instead of TotalColoringConstraint and use the default solver")
+    parser.add_argument("--no-decompose", dest="decompose", action="store_false", help="Solve the whole graph instead of its biconnected components")
+    args = parser.parse_args()
+
+    if args.check_bounds:
+        status, msg = total_bounds_dataset(closed_form_graphs)
+        print(msg)
+    elif args.name is None:
         results = PrettyTable(["Test name", "Points", "Your time [s]", "Time limit on recodex [s]", "Evaluation"])
         for name in tests:
             print("Running test", name)
             dataset, points, time_limit = tests[name]
             start_time = time()
-            status, msg = total_coloring_dataset(dataset)
+            status, msg = total_coloring_dataset(dataset, args.symmetry, args.bounds, args.native, args.decompose)
             running_time = time() - start_time
             print(msg)
             print()
             results.add_row([name, points, running_time, time_limit, msg])
         print(results)
     else:
-        name = sys.argv[1]
+        name = args.name
         if name in tests:
             dataset, points, time_limit = tests[name]
-            status, msg = total_coloring_dataset(dataset)
+            status, msg = total_coloring_dataset(dataset, args.symmetry, args.bounds, args.native, args.decompose)
             print(msg)
         else:
             print("Unknown test", name)
@@ -123,6 +162,21 @@ $ python3 total_tests.py
 
 To run a test NAME, run the command
 $ python3 total_tests.py NAME
+
+To measure the solver without symmetry breaking, add the option
+$ python3 total_tests.py --no-symmetry
+
+To run the solver even if the bounds from total_bounds are equal, add the option
+$ python3 total_tests.py --no-bounds
+
+To check colorings of total_bounds for complete graphs, complete bipartite graphs, cycles and paths against the solver without bounds, run the command
+$ python3 total_tests.py --check-bounds
+
+To compare with AllDifferentConstraint solved by the default solver of python-constraint, add the option
+$ python3 total_tests.py --no-native
+
+To solve the whole graph instead of its biconnected components, add the option
+$ python3 total_tests.py --no-decompose
 """
 if __name__ == "__main__":
     main()
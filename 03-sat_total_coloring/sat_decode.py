@@ -0,0 +1,32 @@
+import numpy
+
+
+def model_array(model):
+    """
+        Convert a model returned by a pysat solver into a numpy boolean array.
+        model - list of literals where the variable x is true if x is in the list and false if -x is in the list
+        returns - boolean array indexed by variable ids; the index 0 is unused and false
+    """
+    literals = numpy.asarray(model, dtype=numpy.int64)
+    size = int(numpy.abs(literals).max()) if len(literals) else 0
+    truth = numpy.zeros(size + 1, dtype=bool)
+    truth[literals[literals > 0]] = True
+    return truth
+
+
+def decode_one_hot(truth, count, values, first=1):
+    """
+        Decode values of elements encoded one-hot by consecutive variables.
+        The element i takes the value c if the variable first + i * values + c is true, for c from 0 to values-1.
+        truth - boolean array returned by model_array
+        count - number of elements
+        values - number of values of every element
+        returns - integer array of values of elements obtained by argmax over the slice of every element
+    """
+    block = numpy.zeros((count, values), dtype=bool)
+    available = truth[first:first + count * values]
+    block.flat[:len(available)] = available
+    decoded = block.argmax(axis=1)
+    if not block[numpy.arange(count), decoded].all():
+        raise ValueError("Some element has no true variable in the model")
+    return decoded
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path.append("..")
+from functools import partial
+
+import total_sat
+from total_benchmark_common import argument_parser, run_benchmark
+
+def problem_size(graph, amo):
+    """
+        Return a pair (variables, clauses) of the formula of total_sat.total_formula for the whole graph with D+2 colors;
+        the pairwise encoding is counted without building it.
+        The solver may solve smaller formulas, e.g. pieces of a decomposed graph or fewer colors, or none if total_bounds settles the graph.
+    """
+    degrees = [ graph.degree[v] for v in graph.nodes ]
+    elements = graph.number_of_nodes() + graph.number_of_edges()
+    colors = max(degrees, default=0) + 2
+    if amo != "pairwise":
+        clauses, variables = total_sat.total_formula(graph, colors, amo)[:2]
+        return variables, len(clauses)
+    clauses = elements * (1 + colors * (colors - 1) // 2)
+    clauses += colors * sum(d * (d - 1) // 2 for d in degrees) + 3 * colors * graph.number_of_edges()
+    return elements * colors, clauses
+
+def main():
+    parser = argument_parser()
+    parser.add_argument("--amo", choices=total_sat.AMO_ENCODINGS, default="pairwise", help="Encoding of at-most-one constraints")
+    parser.add_argument("--solver", nargs="+", default=["glucose3"], help="Name of a pysat solver; several names are raced in parallel processes")
+    parser.add_argument("--portfolio", action="store_true", help="Race the solvers of total_sat.PORTFOLIO, at most one per CPU")
+    args = parser.parse_args()
+    sat_solver = total_sat.PORTFOLIO if args.portfolio else args.solver[0] if len(args.solver) == 1 else args.solver
+    options = { "symmetry": args.symmetry, "bounds": args.bounds, "decompose": args.decompose, "amo": args.amo, "solver": sat_solver }
+    size_columns = { "whole_graph_variables": "Variables (whole graph)", "whole_graph_clauses": "Clauses (whole graph)" }
+    run_benchmark(args, "sat", total_sat.total_coloring, options, partial(problem_size, amo=args.amo), size_columns, sat_solvers=True)
+
+"""
+To benchmark the SAT solver on all families of graphs, run the command
+$ python3 total_benchmark.py
+
+To benchmark hypercubes of dimensions 3 to 7 and save results into a CSV file, run the command
+$ python3 total_benchmark.py hypercube --sizes 3 4 5 6 7 --output hypercube.csv
+
+To measure five random 4-regular graphs of every size three times each with a time limit of 10 seconds, run the command
+$ python3 total_benchmark.py regular --degree 4 --graphs 5 --repeat 3 --timeout 10 --output regular.json
+
+To record which pysat solver of a portfolio answers on every hypercube, run the command
+$ python3 total_benchmark.py hypercube --portfolio --no-bounds
+
+To benchmark the solver without total_bounds, decomposition or symmetry breaking, add the options
+$ python3 total_benchmark.py --no-bounds --no-decompose --no-symmetry
+
+The CSP solver is benchmarked by 02-csp_total_coloring/total_benchmark.py on the same graphs for the same options.
+"""
+if __name__ == "__main__":
+    main()
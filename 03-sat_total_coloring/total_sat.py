@@ -1,30 +1,357 @@
-from pysat.solvers import Glucose3
+import os
+import queue
+import multiprocessing
+from pysat.card import CardEnc, EncType
+from pysat.solvers import Solver
+from total_common import symmetry_breaking, total_bounds, assign_coloring, decomposed_total_coloring
+from functools import partial
+from sat_decode import model_array, decode_one_hot
 
 
-def total_coloring(graph):
+def at_most_one_pairwise(literals, top):
+    """ Binary clause for every pair of literals; no auxiliary variables. """
+    clauses = []
+    for j in range(len(literals) - 1):
+        for i in range(j + 1, len(literals)):
+            clauses.append([-literals[j], -literals[i]])
+    return clauses, top
+
+
+def at_most_one_seqcounter(literals, top):
+    """ Sequential counter of Sinz: auxiliary variable s_i is true if one of the first i literals is true; 3n clauses. """
+    if len(literals) <= 1:
+        return [], top
+    clauses = []
+    s = list(range(top + 1, top + len(literals)))
+    clauses.append([-literals[0], s[0]])
+    for i in range(1, len(literals) - 1):
+        clauses.append([-literals[i], s[i]])
+        clauses.append([-s[i - 1], s[i]])
+        clauses.append([-literals[i], -s[i - 1]])
+    clauses.append([-literals[-1], -s[-1]])
+    return clauses, top + len(literals) - 1
+
+
+def at_most_one_commander(literals, top, group=3):
+    """
+        Commander encoding of Klieber and Kwon: literals are split into groups of a given size,
+        every group has at most one true literal and a commander variable implied by its literals,
+        and at most one commander is true which is encoded recursively.
+    """
+    if len(literals) <= group + 1:
+        return at_most_one_pairwise(literals, top)
+    clauses = []
+    commanders = []
+    for i in range(0, len(literals), group):
+        part = literals[i:i + group]
+        top += 1
+        commanders.append(top)
+        clauses += at_most_one_pairwise(part, top)[0]
+        for x in part:
+            clauses.append([-x, top])
+    more, top = at_most_one_commander(commanders, top, group)
+    return clauses + more, top
+
+
+def at_most_one_cardenc(encoding):
+    """ Return an encoding using pysat.card.CardEnc with a given pysat.card.EncType. """
+    def at_most_one(literals, top):
+        if len(literals) <= 1:
+            return [], top
+        formula = CardEnc.atmost(lits=literals, bound=1, top_id=top, encoding=encoding)
+        return formula.clauses, max(top, formula.nv)
+    return at_most_one
+
+
+# Encodings of at-most-one constraints; every function gets a list of literals and the largest used variable
+# and returns a pair (list of clauses, the largest used variable including auxiliary variables).
+AMO_ENCODINGS = {
+    "pairwise": at_most_one_pairwise,
+    "seqcounter": at_most_one_seqcounter,
+    "commander": at_most_one_commander,
+    "card-seqcounter": at_most_one_cardenc(EncType.seqcounter),
+    "card-ladder": at_most_one_cardenc(EncType.ladder),
+    "card-bitwise": at_most_one_cardenc(EncType.bitwise),
+    "card-totalizer": at_most_one_cardenc(EncType.totalizer),
+}
+
+
+# Backends raced by default in the portfolio mode; names are accepted by pysat.solvers.Solver.
+# A race starts only as many of them as there are CPUs, so the order is the order of preference.
+PORTFOLIO = ["glucose3", "glucose4", "cadical153", "maplechrono", "lingeling", "minisat22"]
+
+# Formulas with fewer clauses are solved by the first solver of a portfolio only, since starting the processes
+# of a race takes longer than solving them; e.g. a star split into hundreds of bridges would start a race for every bridge.
+PORTFOLIO_MIN_CLAUSES = 20000
+
+# Seconds between checks of a race whether its workers are still alive.
+RACE_POLL_INTERVAL = 1.0
+
+
+def solve_queries(solver, formula, queries, additions=None):
+    """
+        Solve a formula by a pysat solver of a given name under lists of assumptions in a given order using a single solver,
+        so learned clauses are kept between queries.
+        additions - if given, a function of the index of a query returning clauses added to the solver before the query
+        returns - a pair (index of the first satisfiable query, its model) or (None, None) if no query is satisfiable
+    """
+    with Solver(name=solver, bootstrap_with=formula) as sat:
+        for i, assumptions in enumerate(queries):
+            if additions is not None:
+                sat.append_formula(additions(i))
+            if sat.solve(assumptions=assumptions):
+                return i, sat.get_model()
+    return None, None
+
+
+def portfolio_worker(solver, formula, queries, additions, results):
+    """ Put a tuple (solver, index, model, error) into the queue results. """
+    try:
+        results.put((solver, *solve_queries(solver, formula, queries, additions), None))
+    except Exception as error:
+        results.put((solver, None, None, repr(error)))
+
+
+def race(solvers, formula, queries, additions=None):
+    """
+        Run solve_queries by several solvers in parallel processes and terminate all of them when the first one finishes.
+        Only the first os.cpu_count() solvers are started, since more processes than CPUs only share the time of the CPUs.
+        Every worker builds its own solver from its own copy of the formula, so a race needs about as many times
+        the memory of a single solver as there are workers.
+        Solvers which fail, e.g. are not available in the installed version of pysat, are ignored unless all of them fail.
+        If all workers exit and some of them without an answer, e.g. killed for lack of memory or by a crash of a solver,
+        the formula is solved in this process by the first such solver.
+        returns - a tuple (name of the winning solver, index, model)
+    """
+    solvers = solvers[:os.cpu_count() or 1]
+    results = multiprocessing.Queue()
+    processes = { solver: multiprocessing.Process(target=portfolio_worker, args=(solver, formula, queries, additions, results), daemon=True) for solver in solvers }
+    for process in processes.values():
+        process.start()
+    errors = {}
+    try:
+        while len(errors) < len(processes):
+            try:
+                solver, index, model, error = results.get(timeout=RACE_POLL_INTERVAL)
+            except queue.Empty:
+                if any(process.is_alive() for process in processes.values()):
+                    continue
+                try:
+                    # An answer may be sent just before its worker exits.
+                    solver, index, model, error = results.get(timeout=RACE_POLL_INTERVAL)
+                except queue.Empty:
+                    break
+            if error is None:
+                return solver, index, model
+            errors[solver] = error
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+    lost = [ solver for solver in processes if solver not in errors ]
+    if lost:
+        return (lost[0], *solve_queries(lost[0], formula, queries, additions))
+    raise RuntimeError("All solvers of the portfolio failed: " + "; ".join("{}: {}".format(solver, error) for solver, error in errors.items()))
+
+
+def solve_formula(graph, solver, formula, queries, additions=None):
+    """
+        Solve a formula under lists of assumptions and with additions of clauses by solve_queries, or by race if solver is a list of names,
+        the formula has at least PORTFOLIO_MIN_CLAUSES clauses and there are several CPUs;
+        otherwise the formula is solved by the first solver of the list.
+        The name of the solver which answered is appended to the list graph.graph["sat_solvers"].
+        returns - a pair (index of the first satisfiable query, its model) or (None, None)
+    """
+    if not isinstance(solver, str) and (len(formula) < PORTFOLIO_MIN_CLAUSES or (os.cpu_count() or 1) == 1):
+        solver = solver[0]
+    if isinstance(solver, str):
+        index, model = solve_queries(solver, formula, queries, additions)
+    else:
+        solver, index, model = race(solver, formula, queries, additions)
+    graph.graph.setdefault("sat_solvers", []).append(solver)
+    return index, model
+
+
+def total_coloring(graph, incremental=True, amo="pairwise", symmetry=True, bounds=True, decompose=True, minimum=0, known_bounds=None, solver="glucose3"):
+    """
+        Find total chromatic index and total coloring.
+        graph - instance of networkx.Graph
+        incremental - encode the problem once and query the solver under assumptions, see total_coloring_incremental;
+            otherwise the formula is rebuilt for every number of colors, see total_coloring_rebuild
+        amo - name of the encoding of at-most-one constraints from AMO_ENCODINGS used by the incremental mode
+        symmetry - fix colors of a vertex of the maximum degree and its edges, see total_common.symmetry_breaking
+        bounds - compute bounds and a coloring by total_common.total_bounds, skip the solver if both bounds are equal
+            and otherwise ask the solver only for numbers of colors from the lower bound to the upper bound minus one
+        decompose - solve biconnected components in worker processes and merge their colorings, see total_common.decomposed_total_coloring
+        minimum - a number of colors which is acceptable anyway, so fewer than min(minimum, D+2) colors are not tried
+            and the returned number of colors may exceed x if it is at most minimum;
+            decomposed_total_coloring uses it for pieces of a graph which needs at least minimum colors anyway
+        known_bounds - a tuple returned by total_common.total_bounds for the graph which is used instead of computing it again;
+            decomposed_total_coloring passes bounds it has already computed
+        solver - name of a pysat solver, e.g. glucose3, cadical153 or maplechrono, or a list of names raced in parallel processes,
+            see solve_formula; the race runs per formula, so small pieces of a decomposed graph use the first solver only; names of solvers which answered are appended to the list graph.graph["sat_solvers"]
+        returns - total chromatic index x
+        Furthermore, assign property "color" for every vertex and edge. The value of the color is an integer between 0 and x-1.
+    """
+    if decompose:
+        solve = partial(total_coloring, incremental=incremental, amo=amo, symmetry=symmetry, bounds=bounds, decompose=False, solver=solver)
+        return decomposed_total_coloring(graph, solve, bounds=bounds)
+
+    minimum = min(minimum, max((graph.degree[v] for v in graph.nodes), default=0) + 2)
+    if not bounds:
+        if incremental:
+            return total_coloring_incremental(graph, amo, symmetry, minimum, solver=solver)
+        return total_coloring_rebuild(graph, minimum, symmetry, solver=solver)
+
+    lower, upper, node_colors, edge_colors = known_bounds or total_bounds(graph)
+    lower = max(lower, minimum)
+    count = None
+    if lower < upper:
+        if incremental:
+            count = total_coloring_incremental(graph, amo, symmetry, lower, upper, solver)
+        else:
+            count = total_coloring_rebuild(graph, lower, symmetry, upper, solver)
+    if count is None:
+        assign_coloring(graph, node_colors, edge_colors)
+        return upper
+    return count
+
+
+def total_formula(graph, colors, amo="pairwise", start=None):
+    """
+        Encode total coloring of a graph by a given number of colors.
+        Every vertex and edge has exactly one color, which uses an at-most-one constraint from AMO_ENCODINGS,
+        and at most one edge incident to a vertex has a given color, which uses the same encoding.
+        If start is given and smaller than colors, only the first start colors are encoded, and every further color c
+        has a selector variable which forbids the color c for all vertices and edges if it is assumed.
+        Clauses of such a color are generated by color_clauses(c) and added to the solver only before it is asked for c colors,
+        so a solver which answers with start colors does not load them; an element gets binary clauses with all smaller colors
+        instead of the at-most-one encoding.
+        returns - a tuple (clauses, variables, node_var, edge_var, selector, color_clauses) where clauses is a list of clauses over variables
+            from 1 to variables, node_var(v, c) and edge_var(u, v, c) are variables of a vertex and an edge having a color c from 1 to colors,
+            selector(c) is the selector variable of a color c above start and color_clauses(c) returns clauses of such a color
+            whose auxiliary variables follow variables
+    """
+    at_most_one = AMO_ENCODINGS[amo]
+    start = colors if start is None else min(start, colors)
+    color = list(range(1, start + 1))
+
+    # Every vertex and every edge is an element of the total graph; elements are numbered from zero.
+    node = { v: i for i, v in enumerate(graph.nodes) }
+    total_edges = {}
+    for i, (u, v) in enumerate(graph.edges, len(node)):
+        total_edges[u, v] = i
+        total_edges[v, u] = i
+    elements = len(node) + graph.number_of_edges()
+    incident = [ [total_edges[e] for e in graph.edges(v)] for v in graph.nodes ]
+
+    def var(x, c):
+        return x * colors + c
+
+    def selector(c):
+        return elements * colors + c - start
+
+    def shared_clauses(c, top):
+        """ Return clauses of incident edges and adjacent elements having a color c and the largest used variable. """
+        formula = []
+        for edges in incident:
+            clauses, top = at_most_one([var(e, c) for e in edges], top)
+            formula += clauses
+        for e0, e1 in graph.edges:
+            e = total_edges[e0, e1]
+            formula.append([-var(node[e0], c), -var(node[e1], c)])
+            formula.append([-var(node[e0], c), -var(e, c)])
+            formula.append([-var(node[e1], c), -var(e, c)])
+        return formula, top
+
+    formula = []
+    top = elements * colors + colors - start
+    for x in range(elements):
+        formula.append([var(x, c) for c in range(1, colors + 1)])
+        clauses, top = at_most_one([var(x, c) for c in color], top)
+        formula += clauses
+        for c in range(start + 1, colors + 1):
+            formula.append([-selector(c), -var(x, c)])
+    for c in color:
+        clauses, top = shared_clauses(c, top)
+        formula += clauses
+    variables = top
+
+    def color_clauses(c):
+        nonlocal top
+        clauses = [ [-var(x, c), -var(x, d)] for x in range(elements) for d in range(1, c) ]
+        more, top = shared_clauses(c, top)
+        return clauses + more
+
+    return formula, variables, lambda v, c: var(node[v], c), lambda u, v, c: var(total_edges[u, v], c), selector, color_clauses
+
+
+def total_coloring_incremental(graph, amo="pairwise", symmetry=True, start=None, stop=None, solver="glucose3"):
+    """
+        Total coloring using a single solver.
+        The total chromatic index is at least D+1 where D is the maximum degree and it is conjectured to be at most D+2.
+        Therefore, a single solver is asked for D+1 colors by assuming the selector of the last color of total_formula with D+2 colors,
+        and then for D+2 colors without assumptions, so the learned clauses are kept between both queries.
+        The formula contains only clauses of D+1 colors, and clauses of the last color are added only before the second query,
+        so a graph colored by D+1 colors needs about as large a formula as total_coloring_rebuild.
+        If even D+2 colors are not sufficient, the search continues by total_coloring_rebuild.
+        start - the smallest tried number of colors; D+1 if it is not given or smaller
+        stop - if given, only numbers of colors smaller than stop are tried and None is returned if none of them is sufficient
+    """
+    max_deg = max((graph.degree[v] for v in graph.nodes), default=0)
+    start = max(max_deg + 1, start or 0)
+    colors = max(start, max_deg + 2) if stop is None else min(max(start, max_deg + 2), stop - 1)
+    formula, _, node_var, edge_var, selector, color_clauses = total_formula(graph, colors, amo, start)
+    if symmetry:
+        # Pinned colors are at most D, so they are never forbidden by the selector of the last color.
+        node_colors, edge_colors = symmetry_breaking(graph)
+        formula += [[node_var(v, c + 1)] for v, c in node_colors.items()]
+        formula += [[edge_var(u, v, c + 1)] for (u, v), c in edge_colors.items()]
+
+    queries = [ [selector(c) for c in range(count + 1, colors + 1)] for count in range(start, colors + 1) ]
+    index, model = solve_formula(graph, solver, formula, queries, lambda i: color_clauses(start + i) if i > 0 else [])
+    if index is None:
+        if stop is not None and colors + 1 >= stop:
+            return None
+        return total_coloring_rebuild(graph, colors + 1, symmetry, stop, solver)
+
+    assign_colors(graph, model, colors)
+    return start + index
+
+
+def total_coloring_rebuild(graph, start=None, symmetry=True, stop=None, solver="glucose3"):
+    """
+        Total coloring building a new solver for every number of colors from start, which is D+1 if it is not given or smaller.
+        stop - if given, only numbers of colors smaller than stop are tried and None is returned if none of them is sufficient
+    """
+    node_colors, edge_colors = symmetry_breaking(graph) if symmetry else ({}, {})
     solution = []
     colors = []
     node = {}
     total_edges = {}
+    # Edges are keyed by tagged indices, so they never share keys of node with vertices labelled by integers, e.g. in pieces of a graph.
     edge1 = len(graph.nodes)
     value_edges = []
     max_deg = 0
 
     for node_val in graph.nodes:
         max_deg = max(graph.degree[node_val], max_deg)
-    count = max_deg
+    count = max(max_deg, (start or 0) - 1)
 
     for edge in graph.edges:
-        value_edges.append(edge1)
-        total_edges[edge[0], edge[1]] = edge1
-        total_edges[edge[1], edge[0]] = edge1
+        value_edges.append(("edge", edge1))
+        total_edges[edge[0], edge[1]] = ("edge", edge1)
+        total_edges[edge[1], edge[0]] = ("edge", edge1)
         edge1 += 1
 
     solution = False
 
     while not solution:
-        Glu = Glucose3()
+        formula = []
         count += 1
+        if stop is not None and count >= stop:
+            return None
         color = list(range(1, count + 1))
 
         y = 0
@@ -39,68 +366,46 @@ def total_coloring(graph):
             y += 1
 
         for v in graph.nodes:
-            Glu.add_clause([node[v, c] for c in color])
+            formula.append([node[v, c] for c in color])
 
             for j in range(len(color) - 1):
                 for i in range(j + 1, len(color)):
-                    Glu.add_clause([-node[v, color[j]], -node[v, color[i]]])
+                    formula.append([-node[v, color[j]], -node[v, color[i]]])
             incident = [e for e in graph.edges(v)]
             for c in color:
                 if len(incident) > 1:
                     for i in range(len(incident) - 1):
                         for j in range(i + 1, len(incident)):
-                            Glu.add_clause([-node[total_edges[incident[i]], c], -node[total_edges[incident[j]], c]])
+                            formula.append([-node[total_edges[incident[i]], c], -node[total_edges[incident[j]], c]])
 
         for e0, e1 in graph.edges:
             e = total_edges[e0, e1]
             for i in range(len(color) - 1):
                 for j in range(i + 1, len(color)):
-                    Glu.add_clause([-node[e, color[i]], -node[e, color[j]]])
-            Glu.add_clause([node[e, c] for c in color])
+                    formula.append([-node[e, color[i]], -node[e, color[j]]])
+            formula.append([node[e, c] for c in color])
             for c in color:
-                Glu.add_clause([-node[e0, c], -node[e1, c]])
-                Glu.add_clause([-node[e0, c], -node[e, c]])
-                Glu.add_clause([-node[e1, c], -node[e, c]])
-            Glu.add_clause([node[e, c] for c in color])
-        if Glu.solve():
-            solution = Glu.get_model()
-
-    solution = [x for x in solution if x > 0]
-
-    for u in graph.nodes():
-        col = -1
-        for c in color:
-            var_num = node[u, c]
-            i, j = 0, len(solution) - 1
-            while i <= j:
-                m = (i + j) // 2
-                if solution[m] == var_num:
-                    col = c
-                    break
-                elif solution[m] < var_num:
-                    i = m + 1
-                else:
-                    j = m - 1
-            if col != -1:
-                break
-        graph.nodes[u]["color"] = col - 1
-
-    for x, y in graph.edges():
-        e_color = -1
-        for c in color:
-            var_num = node[total_edges[x, y], c]
-            i, j = 0, len(solution) - 1
-            while i <= j:
-                m = (i + j) // 2
-                if solution[m] == var_num:
-                    e_color = c
-                    break
-                elif solution[m] < var_num:
-                    i = m + 1
-                else:
-                    j = m - 1
-            if e_color != -1:
-                break
-        graph.edges[x, y]["color"] = e_color - 1
+                formula.append([-node[e0, c], -node[e1, c]])
+                formula.append([-node[e0, c], -node[e, c]])
+                formula.append([-node[e1, c], -node[e, c]])
+            formula.append([node[e, c] for c in color])
+        for v, c in node_colors.items():
+            formula.append([node[v, c + 1]])
+        for e, c in edge_colors.items():
+            formula.append([node[total_edges[e], c + 1]])
+        _, solution = solve_formula(graph, solver, formula, [[]])
 
+    assign_colors(graph, solution, count)
     return count
+
+
+def assign_colors(graph, model, colors):
+    """
+        Assign property "color" of vertices and edges from a model of a formula using the variables of total_formula,
+        i.e. the vertex or edge with index x in graph.nodes followed by graph.edges has the color c-1 if the variable x * colors + c is true.
+    """
+    decoded = decode_one_hot(model_array(model), graph.number_of_nodes() + graph.number_of_edges(), colors).tolist()
+    for u, c in zip(graph.nodes, decoded):
+        graph.nodes[u]["color"] = c
+    for (u, v), c in zip(graph.edges, decoded[graph.number_of_nodes():]):
+        graph.edges[u, v]["color"] = c
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import sys
+import argparse
 sys.path.append("..")
 import check_versions
 from prettytable import PrettyTable
 from time import time
 import networkx
-from total_sat import total_coloring
+from total_sat import total_coloring, total_formula, AMO_ENCODINGS, PORTFOLIO
+from total_common import total_bounds, assign_coloring
 
 def verify_total_coloring(graph_original, graph_student, expected_colors, colors):
     if not isinstance(colors, int):
@@ -56,20 +58,51 @@ def verify_total_coloring(graph_original, graph_student, expected_colors, colors
 
     return (True, "Correct")
 
-def total_coloring_test(name, graph_original, expected_colors):
+def total_coloring_test(name, graph_original, expected_colors, amo="pairwise", symmetry=True, bounds=True, decompose=True, solver="glucose3", incremental=True):
     print("Tested graph:", name)
     graph_student = graph_original.copy()
-    colors = total_coloring(graph_student)
+    colors = total_coloring(graph_student, incremental=incremental, amo=amo, symmetry=symmetry, bounds=bounds, decompose=decompose, solver=solver)
+    if not isinstance(solver, str) and graph_student.graph.get("sat_solvers"):
+        print("Answered by:", ", ".join(sorted(set(graph_student.graph["sat_solvers"]))))
     return verify_total_coloring(graph_original, graph_student, expected_colors, colors)
 
-def total_coloring_dataset(dataset):
+def total_bounds_test(name, graph_original):
+    """ Check that total_bounds settles a graph by a coloring with the number of colors found by the solver without bounds. """
+    print("Tested graph:", name)
+    lower, upper, node_colors, edge_colors = total_bounds(graph_original)
+    if lower != upper:
+        return (False, f"Bounds {lower} and {upper} of a graph with a closed form are not equal.")
+    expected_colors = total_coloring(graph_original.copy(), bounds=False, decompose=False)
+    graph_bounds = graph_original.copy()
+    assign_coloring(graph_bounds, node_colors, edge_colors)
+    return verify_total_coloring(graph_original, graph_bounds, expected_colors, upper)
+
+def total_bounds_dataset(dataset):
+    """ Run total_bounds_test for every pair (name, graph) of a dataset """
+    for d in dataset:
+        status, msg = total_bounds_test(*d)
+        if not status:
+            return (status, msg)
+    return (True, "Correct")
+
+def total_coloring_dataset(dataset, amo="pairwise", symmetry=True, bounds=True, decompose=True, solver="glucose3", incremental=True):
     """ Run a set of tests """
     for d in dataset:
-        status, msg = total_coloring_test(*d)
+        status, msg = total_coloring_test(*d, amo=amo, symmetry=symmetry, bounds=bounds, decompose=decompose, solver=solver, incremental=incremental)
         if not status:
             return (status, msg)
     return (True, "Correct")
 
+def encoding_report(dataset, encodings):
+    """ Return a PrettyTable with numbers of variables and clauses of the formula with D+2 colors for every graph and encoding. """
+    report = PrettyTable(["Tested graph", "Encoding", "Variables", "Clauses"])
+    for name, graph, _ in dataset:
+        colors = max((graph.degree[v] for v in graph.nodes), default=0) + 2
+        for amo in encodings:
+            clauses, variables = total_formula(graph, colors, amo)[:2]
+            report.add_row([name, amo, variables, len(clauses)])
+    return report
+
 def main():
     small_graphs = [
         ("Complete graph on 3 vertices", networkx.complete_graph(3), 3),
@@ -91,31 +124,55 @@ def main():
         ("Les Miserables", networkx.les_miserables_graph(), 37)
     ]
 
+    # Graphs whose total chromatic index is given by a closed form or a greedy coloring of total_bounds.
+    closed_form_graphs = [ (f"Complete graph on {n} vertices", networkx.complete_graph(n)) for n in range(1, 8) ]
+    closed_form_graphs += [ (f"Complete bipartite graph on {a}+{b} vertices", networkx.complete_bipartite_graph(a, b)) for a in range(1, 4) for b in range(a, 5) ]
+    closed_form_graphs += [ (f"Cycle of length {n}", networkx.cycle_graph(n)) for n in range(3, 11) ]
+    closed_form_graphs += [ (f"Path on {n} vertices", networkx.path_graph(n)) for n in range(2, 9) ]
+
     tests = {
             "small": (small_graphs, 5, 60),
             "large": (large_graphs, 5, 60)
     }
 
-    if len(sys.argv) == 1:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", nargs="?", help="Run only the test of a given name")
+    parser.add_argument("--no-incremental", dest="incremental", action="store_false", help="Rebuild the formula for every number of colors instead of querying one solver under assumptions")
+    parser.add_argument("--amo", choices=AMO_ENCODINGS, default="pairwise", help="Encoding of at-most-one constraints")
+    parser.add_argument("--check-bounds", action="store_true", help="Compare colorings of total_bounds for complete graphs, complete bipartite graphs, cycles and paths with the solver without bounds")
+    parser.add_argument("--no-symmetry", dest="symmetry", action="store_false", help="Do not fix colors of a vertex of the maximum degree and its edges")
+    parser.add_argument("--no-bounds", dest="bounds", action="store_false", help="Always run the solver from D+1 colors without total_bounds")
+    parser.add_argument("--no-decompose", dest="decompose", action="store_false", help="Solve the whole graph instead of its biconnected components")
+    parser.add_argument("--solver", nargs="+", default=["glucose3"], help="Name of a pysat solver; several names are raced in parallel processes")
+    parser.add_argument("--portfolio", action="store_true", help="Race the solvers of total_sat.PORTFOLIO, at most one per CPU")
+    parser.add_argument("--report", action="store_true", help="Print numbers of variables and clauses of all encodings instead of running tests")
+    args = parser.parse_args()
+    solver = PORTFOLIO if args.portfolio else args.solver[0] if len(args.solver) == 1 else args.solver
+
+    if args.name is not None and not args.name in tests:
+        print("Unknown test", args.name)
+    elif args.report:
+        names = list(tests) if args.name is None else [args.name]
+        print(encoding_report([ d for name in names for d in tests[name][0] ], AMO_ENCODINGS))
+    elif args.check_bounds:
+        status, msg = total_bounds_dataset(closed_form_graphs)
+        print(msg)
+    elif args.name is None:
         results = PrettyTable(["Test name", "Points", "Your time [s]", "Time limit on recodex [s]", "Evaluation"])
         for name in tests:
             print("Running test", name)
             dataset, points, time_limit = tests[name]
             start_time = time()
-            status, msg = total_coloring_dataset(dataset)
+            status, msg = total_coloring_dataset(dataset, args.amo, args.symmetry, args.bounds, args.decompose, solver, args.incremental)
             running_time = time() - start_time
             print(msg)
             print()
             results.add_row([name, points, running_time, time_limit, msg])
         print(results)
     else:
-        name = sys.argv[1]
-        if name in tests:
-            dataset, points, time_limit = tests[name]
-            status, msg = total_coloring_dataset(dataset)
-            print(msg)
-        else:
-            print("Unknown test", name)
+        dataset, points, time_limit = tests[args.name]
+        status, msg = total_coloring_dataset(dataset, args.amo, args.symmetry, args.bounds, args.decompose, solver, args.incremental)
+        print(msg)
 
 """
 To run all tests, run the command
@@ -123,6 +180,35 @@ $ python3 total_tests.py
 
 To run a test NAME, run the command
 $ python3 total_tests.py NAME
+
+To rebuild the formula for every number of colors, e.g. together with --no-bounds to solve pieces of the decomposition by total_coloring_rebuild, add the option
+$ python3 total_tests.py --no-incremental --no-bounds
+
+To encode at-most-one constraints by an encoding AMO (pairwise, seqcounter, commander or card-*), add the option
+$ python3 total_tests.py --amo AMO
+
+To measure the solver without symmetry breaking, add the option
+$ python3 total_tests.py --no-symmetry
+
+To run the solver even if the bounds from total_bounds are equal, add the option
+$ python3 total_tests.py --no-bounds
+
+To check colorings of total_bounds for complete graphs, complete bipartite graphs, cycles and paths against the solver without bounds, run the command
+$ python3 total_tests.py --check-bounds
+
+To solve the whole graph instead of its biconnected components, add the option
+$ python3 total_tests.py --no-decompose
+
+To use another pysat solver, e.g. cadical153, or to race several solvers and print which one answered, add the option
+$ python3 total_tests.py --solver cadical153
+$ python3 total_tests.py --solver glucose4 cadical153 maplechrono
+
+To race all solvers of total_sat.PORTFOLIO, add the option;
+at most one solver per CPU is started and every one keeps its own copy of the formula, so the race needs more memory
+$ python3 total_tests.py --portfolio
+
+To print numbers of variables and clauses of the formula for every graph and encoding, run the command
+$ python3 total_tests.py --report
 """
 if __name__ == "__main__":
     main()
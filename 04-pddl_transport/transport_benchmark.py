@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import os
+import csv
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from time import perf_counter
+from prettytable import PrettyTable
+from pyperplan import planner
+from pyperplan.pddl.parser import Parser
+
+import transport_cache
+from transport_test import search_algorithms, heuristics, count_expansions
+from transport_validator import TransportValidator
+from transport_generator import generate_problem
+
+phases = ["parse", "ground", "search", "validate"]
+
+def run_phases(domain_file, problem_file, search_name, heuristic_name, cache, connection):
+    """
+        Parse, ground, search and validate a problem in a child process.
+        After every phase, a pair (phase, dictionary of results) is sent back, so phases finished before a timeout are reported;
+        the time of every phase is stored under the key phase_time.
+    """
+    start_time = perf_counter()
+    parser = Parser(domain_file, problem_file)
+    problem = parser.parse_problem(parser.parse_domain())
+    connection.send(("parse", { "parse_time": perf_counter() - start_time }))
+
+    start_time = perf_counter()
+    task = transport_cache.ground(problem, domain_file, problem_file, cache)
+    connection.send(("ground", { "ground_time": perf_counter() - start_time, "facts": len(task.facts), "operators": len(task.operators) }))
+
+    start_time = perf_counter()
+    heuristic = None if search_name == "bfs" else heuristics[heuristic_name](task)
+    expansions = count_expansions(task)
+    solution = planner._search(task, search_algorithms[search_name], heuristic)
+    connection.send(("search", { "search_time": perf_counter() - start_time, "expansions": expansions[0],
+        "plan_length": None if solution is None else len(solution) }))
+    if solution is None:
+        connection.send(("done", { "status": "unsolved" }))
+        return
+
+    start_time = perf_counter()
+    status, msg = TransportValidator(problem).validate([ action.name for action in solution ])
+    connection.send(("validate", { "validate_time": perf_counter() - start_time }))
+    connection.send(("done", { "status": "ok" if status else msg }))
+
+def benchmark_case(domain_file, problem_file, search_name, heuristic_name, cache, timeout):
+    """ Run all phases of a problem in a new process which is killed after timeout seconds and return a dictionary of results. """
+    results = { "status": "failed" }
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_phases, args=(domain_file, problem_file, search_name, heuristic_name, cache, sender))
+    process.start()
+    sender.close()
+    deadline = perf_counter() + timeout
+    while True:
+        if not receiver.poll(max(0, deadline - perf_counter())):
+            process.kill()
+            results["status"] = "timeout"
+            break
+        try:
+            phase, values = receiver.recv()
+        except EOFError:
+            break
+        results.update(values)
+        if phase == "done":
+            break
+    process.join()
+    return results
+
+def benchmark(args):
+    """ Generate and run problems of all sizes given by the command line and return a list of dictionaries, one for every problem. """
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            cars, places, boxes = args.cars or size, args.places or size, args.boxes or size
+            for seed in range(args.seed, args.seed + args.problems):
+                print("Running", cars, "cars,", places, "places,", boxes, "boxes, seed", seed, flush=True)
+                problem_file = os.path.join(directory, "task_{}_{}_{}_{}.pddl".format(cars, places, boxes, seed))
+                with open(problem_file, "w") as f:
+                    f.write(generate_problem(cars, places, boxes, args.density, seed))
+                record = { "cars": cars, "places": places, "boxes": boxes, "density": args.density, "seed": seed,
+                    "algorithm": args.search, "heuristic": None if args.search == "bfs" else args.heuristic }
+                record.update({ key: None for key in ["facts", "operators", "expansions", "plan_length"] + [ p + "_time" for p in phases ] })
+                record.update(benchmark_case(args.domain, problem_file, args.search, args.heuristic, args.cache, args.timeout))
+                records.append(record)
+    return records
+
+def results_table(records):
+    """ Return a PrettyTable with benchmark records. """
+    columns = ["Cars", "Places", "Boxes", "Seed", "Facts", "Operators", "Status", "Expansions", "Plan length"] + [ p.capitalize() + " [s]" for p in phases ]
+    table = PrettyTable(columns)
+    for r in records:
+        table.add_row([r["cars"], r["places"], r["boxes"], r["seed"], r["facts"] or "-", r["operators"] or "-", r["status"],
+            "-" if r["expansions"] is None else r["expansions"], "-" if r["plan_length"] is None else r["plan_length"]] +
+            [ "-" if r[p + "_time"] is None else "{:.3f}".format(r[p + "_time"]) for p in phases ])
+    return table
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[1, 2, 3, 4, 5], help="Sizes of problems; a problem of size n has n cars, n places and n boxes")
+    parser.add_argument("--cars", type=int, help="Fixed number of cars of all problems")
+    parser.add_argument("--places", type=int, help="Fixed number of places of all problems")
+    parser.add_argument("--boxes", type=int, help="Fixed number of boxes of all problems")
+    parser.add_argument("--density", type=float, default=1.0, help="Fraction of places where boxes and cars start and end; all places are used if at least 1")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first problem")
+    parser.add_argument("--problems", type=int, default=1, help="Number of problems of every size with consecutive seeds")
+    parser.add_argument("--domain", default="domain.pddl", help="Domain definition file")
+    parser.add_argument("--search", choices=search_algorithms, default="gbfs", help="Search algorithm of pyperplan")
+    parser.add_argument("--heuristic", choices=heuristics, default="hff", help="Heuristic of pyperplan used by all search algorithms except bfs")
+    parser.add_argument("--cache", action="store_true", help="Load grounded problems from " + transport_cache.CACHE_DIR + " instead of grounding them")
+    parser.add_argument("--timeout", type=float, default=60, help="Time limit of a single problem in seconds")
+    parser.add_argument("--output", help="Save results into a CSV file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    records = benchmark(args)
+    print(results_table(records))
+    if args.output and records:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+
+"""
+To benchmark problems with 1 to 5 cars, places and boxes by the greedy best-first search and save results into a CSV file, run the command
+$ python3 transport_benchmark.py --output transport.csv
+
+To benchmark problems with 3 cars, 10 places and 2 to 10 boxes, five problems of every size, run the command
+$ python3 transport_benchmark.py 2 4 6 8 10 --cars 3 --places 10 --problems 5
+
+To benchmark A* with the heuristic hmax on problems whose boxes and cars start and end only at about a third of places, run the command
+$ python3 transport_benchmark.py --search astar --heuristic hmax --density 0.3 --timeout 10
+
+Generated problems are stored in a temporary directory; see transport_generator.py to generate a single problem.
+"""
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+from pyperplan import planner
+from pyperplan.task import Task, Operator
+
+# Version of the format of cached files; files of other versions are ignored.
+CACHE_FORMAT = 2
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".grounding_cache")
+
+def cache_key(domain_file, problem_file):
+    """ Return sha256 of the format version and the texts of the domain and the problem. """
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    for filename in (domain_file, problem_file):
+        with open(filename, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def encode_task(task):
+    """
+        Encode a grounded task into a dictionary which can be stored as JSON.
+        Facts are sorted and the i-th fact is represented by the bit 1 << i, so the initial state, goals
+        and preconditions, add effects and delete effects of every operator are bitsets.
+        Every bitset is stored as the sorted list of its bits since operators have only a few facts
+        and printing and parsing integers with thousands of bits takes quadratic time.
+    """
+    facts = sorted(task.facts)
+    index = { fact: i for i, fact in enumerate(facts) }
+    def mask(fact_set):
+        return sorted(index[fact] for fact in fact_set)
+    return {
+        "format": CACHE_FORMAT,
+        "name": task.name,
+        "facts": facts,
+        "initial_state": mask(task.initial_state),
+        "goals": mask(task.goals),
+        "operators": [ [op.name, mask(op.preconditions), mask(op.add_effects), mask(op.del_effects)] for op in task.operators ],
+    }
+
+def decode_task(data):
+    """ Build pyperplan Task from a dictionary returned by encode_task; equal sets of facts are shared by operators. """
+    facts = data["facts"]
+    sets = {}
+    def unmask(mask):
+        key = tuple(mask)
+        if key not in sets:
+            sets[key] = frozenset(facts[i] for i in mask)
+        return sets[key]
+    operators = [ Operator(name, unmask(pre), unmask(add), unmask(delete)) for name, pre, add, delete in data["operators"] ]
+    return Task(data["name"], set(facts), unmask(data["initial_state"]), unmask(data["goals"]), operators)
+
+def load_task(filename):
+    """ Return a grounded task stored in a file or None if the file is missing or has another format. """
+    try:
+        with open(filename, "rb") as f:
+            data = json.loads(gzip.decompress(f.read()))
+    except (OSError, ValueError):
+        return None
+    if data.get("format") != CACHE_FORMAT:
+        return None
+    return decode_task(data)
+
+def save_task(filename, task):
+    """ Store a grounded task into a gzipped JSON file; the file is replaced atomically, so concurrent runs never read a partial file. """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temporary = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temporary, "wb") as f:
+        f.write(gzip.compress(json.dumps(encode_task(task), separators=(",", ":")).encode(), compresslevel=6))
+    os.replace(temporary, filename)
+
+def ground(problem, domain_file, problem_file, cache=True, cache_dir=CACHE_DIR):
+    """
+        Return the grounded task of a parsed problem like pyperplan.planner._ground.
+        If cache is set, the task is loaded from cache_dir if the domain and the problem files were already grounded
+        and otherwise it is grounded and stored there.
+    """
+    if not cache:
+        return planner._ground(problem)
+    filename = os.path.join(cache_dir, cache_key(domain_file, problem_file) + ".json.gz")
+    task = load_task(filename)
+    if task is not None:
+        logging.info("Grounding loaded from {}".format(filename))
+        logging.info("{} Variables loaded".format(len(task.facts)))
+        logging.info("{} Operators loaded".format(len(task.operators)))
+        return task
+    task = planner._ground(problem)
+    save_task(filename, task)
+    return task
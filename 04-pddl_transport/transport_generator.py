@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import sys
+import random
+import argparse
+
+def used_places(places, density, rng):
+    """
+        Return a random subset of places where boxes and cars may start or end; density is the fraction of used places.
+        All places are used if density is at least 1, and at least one place is always used.
+        Only positions are affected, so the problem uses the same facts as the bundled tasks and cars can move between any two places.
+    """
+    count = min(len(places), max(1, round(density * len(places))))
+    return sorted(rng.sample(places, count), key=places.index)
+
+def random_positions(boxes, cars, places, rng):
+    """ Return a dictionary of positions of boxes; every box is at a place or in a car and every car holds at most one box. """
+    free = list(cars)
+    positions = {}
+    for box in boxes:
+        location = rng.choice(places + free)
+        if location in free:
+            free.remove(location)
+        positions[box] = location
+    return positions
+
+def generate_problem(cars, places, boxes, density=1.0, seed=0):
+    """
+        Return the text of a random transport problem in the style of task_three_cars.pddl.
+        Boxes start and end at random places or in random cars, and cars start and end at random places.
+        Initial and goal positions are chosen independently among places given by used_places for a given density.
+    """
+    assert(cars >= 1 and places >= 1 and boxes >= 0)
+    rng = random.Random(seed)
+    car_names = [ "car{}".format(i) for i in range(1, cars + 1) ]
+    place_names = [ "place{}".format(i) for i in range(1, places + 1) ]
+    box_names = [ "box{}".format(i) for i in range(1, boxes + 1) ]
+    initial_places = used_places(place_names, density, rng)
+    initial_boxes = random_positions(box_names, car_names, initial_places, rng)
+    initial_cars = { car: rng.choice(initial_places) for car in car_names }
+    goal_places = used_places(place_names, density, rng)
+    goal_boxes = random_positions(box_names, car_names, goal_places, rng)
+    goal_cars = { car: rng.choice(goal_places) for car in car_names }
+
+    lines = [
+        ";; Generated test with {} cars, {} places, {} boxes, density {} and seed {}".format(cars, places, boxes, density, seed),
+        "(define (problem transport)",
+        "    (:domain transport)",
+        "    (:objects {})".format(" ".join(car_names + place_names + box_names)),
+        "    (:init",
+    ]
+    lines += [ "        (car {})".format(car) for car in car_names ]
+    lines += [ "        (place {})".format(place) for place in place_names ]
+    lines += [ "        (box {})".format(box) for box in box_names ]
+    lines += [ "        (empty {})".format(car) for car in car_names if car not in initial_boxes.values() ]
+    lines += [ "        (at {} {})".format(box, location) for box, location in initial_boxes.items() ]
+    lines += [ "        (at {} {})".format(car, place) for car, place in initial_cars.items() ]
+    lines += [ "    )", "    (:goal (and" ]
+    lines += [ "        (at {} {})".format(box, location) for box, location in goal_boxes.items() ]
+    lines += [ "        (at {} {})".format(car, place) for car, place in goal_cars.items() ]
+    lines += [ "    ))", ")" ]
+    return "\n".join(lines) + "\n"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cars", type=int, default=3, help="Number of cars")
+    parser.add_argument("--places", type=int, default=3, help="Number of places")
+    parser.add_argument("--boxes", type=int, default=3, help="Number of boxes")
+    parser.add_argument("--density", type=float, default=1.0, help="Fraction of places where boxes and cars start and end; all places are used if at least 1")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+    parser.add_argument("--output", help="Write the problem into a file instead of the standard output")
+    args = parser.parse_args()
+
+    problem = generate_problem(args.cars, args.places, args.boxes, args.density, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(problem)
+    else:
+        sys.stdout.write(problem)
+
+"""
+To generate a problem with 5 cars, 8 places and 10 boxes, run the command
+$ python3 transport_generator.py --cars 5 --places 8 --boxes 10 --seed 1 --output task_generated.pddl
+
+To generate a problem whose boxes and cars start and end only at about a third of places, add the option
+$ python3 transport_generator.py --density 0.3
+"""
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,44 @@ import logging
 import sys
 import os
 import time
+import argparse
+import resource
+import multiprocessing
+import multiprocessing.connection
 from time import time
 from prettytable import PrettyTable
 from pyperplan import search, planner
 from pyperplan.pddl.parser import Parser
+import transport_cache
+from transport_validator import TransportValidator
+
+# Search algorithms of pyperplan; all of them except bfs are guided by a heuristic.
+search_algorithms = {
+    "bfs": search.breadth_first_search,
+    "gbfs": search.greedy_best_first_search,
+    "astar": search.astar_search,
+    "ehc": search.enforced_hillclimbing_search,
+}
+
+heuristics = { name: planner.HEURISTICS[name] for name in ["hff", "hadd", "hmax", "landmark"] }
+
+def count_expansions(task):
+    """ Count expanded states of a task, i.e. calls of get_successor_states, in a list of a single number which is returned. """
+    expansions = [0]
+    successors = task.get_successor_states
+    def counted(state):
+        expansions[0] += 1
+        return successors(state)
+    task.get_successor_states = counted
+    return expansions
 
 # Source: https://github.com/aibasel/pyperplan, modified for testing purposes.
-def pyperplan_solver(problem_file, domain_file):
-    search_algorithm = search.breadth_first_search
-    heuristic = None
+def pyperplan_solver(problem_file, domain_file, cache=True, search_name="bfs", heuristic_name="hff", statistics=None):
+    """
+        Solve a problem by a search algorithm of search_algorithms; heuristic_name is ignored by bfs.
+        If statistics is a dictionary, the number of expanded states and the length of the plan are stored there.
+    """
+    search_algorithm = search_algorithms[search_name]
 
     parser = Parser(domain_file, problem_file)
     logging.info("Parsing Domain {}".format(domain_file))
@@ -25,8 +54,13 @@ def pyperplan_solver(problem_file, domain_file):
     logging.info("{} Objects parsed".format(len(problem.objects)))
     logging.info("{} Constants parsed".format(len(domain.constants)))
 
-    task = planner._ground(problem)
+    task = transport_cache.ground(problem, domain_file, problem_file, cache)
+    heuristic = None if search_name == "bfs" else heuristics[heuristic_name](task)
+    expansions = count_expansions(task)
     solution = planner._search(task, search_algorithm, heuristic)
+    if statistics is not None:
+        statistics["expansions"] = expansions[0]
+        statistics["plan_length"] = None if solution is None else len(solution)
 
     if solution is None:
         logging.warning("No solution could be found")
@@ -37,84 +71,33 @@ def pyperplan_solver(problem_file, domain_file):
         return problem, solution
 
 def verify_plan(problem, solution):
-    boxes = dict()
-    cars = dict()
-
-    for state in problem.initial_state:
-        if state.name == "at":
-            object = state.signature[0][0]
-            place = state.signature[1][0]
-            assert(object[:-1] in ["car", "box"] and place[:-1] in ["car", "place"])
-            if object[:-1] == "box":
-                assert(place[:-1] in ["car", "place"])
-                logging.info("Initial state: {} is located in {}".format(object, place))
-                boxes[object] = place
-            else:
-                assert(place[:-1] == "place")
-                logging.info("Initial state: {} is located at {}".format(object, place))
-                cars[object] = place
-
-    for action in solution:
-        logging.info("Action: {}".format(action.name))
-        action = action.name[1:-1].split()
-        assert(all(a[:-1] in ["car", "box", "place"] for a in action[1:]))
-
-        if action[0] == "load":
-            _, box, car, place = action
-            if not box in boxes:
-                return (False, "Cannot load {} in a car".format(box))
-            if not car in cars:
-                return (False, "{} is not a car".format(car))
-            if not place == cars[car]:
-                return (False, "Car {} is not located at {}".format(car, place))
-            if not place == boxes[box]:
-                return (False, "Box {} is already loaded".format(box))
-            if car in boxes.values():
-                return (False, "Car {} is full".format(car))
-            boxes[box] = car
-        elif action[0] == "unload":
-            _, box, car, place = action
-            if not box in boxes:
-                return (False, "Cannot load {} in a car".format(box))
-            if not car in cars:
-                return (False, "{} is not a car".format(car))
-            if not place == cars[car]:
-                return (False, "Car {} is not located at {}".format(car, place))
-            if not car == boxes[box]:
-                return (False, "Box {} is not loaded in car {}".format(box, car))
-            boxes[box] = place
-        elif action[0] == "move":
-            _, car, src, dst = action
-            if not car in cars:
-                return (False, "{} is not a car".format(car))
-            if not src == cars[car]:
-                return (False, "Car {} is not located at {}".format(car, place))
-            if not dst[:-1] == "place":
-                return (False, "{} is not a place}".format(dst))
-            cars[car] = dst
-        else:
-            return (False, "Invalid action {}".format(action[0]))
-
-    for goal in problem.goal:
-        assert(goal.name == "at")
-        object = goal.signature[0][0]
-        place = goal.signature[1][0]
-        assert(object[:-1] in ["car", "box"] and place[:-1] in ["car", "place"])
-        if object[:-1] == "box":
-            assert(place[:-1] in ["car", "place"])
-            logging.info("Goal: Box {} is expected to be at {}".format(object, place))
-            if not boxes[object] == place:
-                return (False, "Box {} is located at {}".format(object, boxes[object]))
-        else:
-            assert(place[:-1] == "place")
-            logging.info("Goal: Car {} is expected to be at {}".format(object, place))
-            if not cars[object] == place:
-                return (False, "Car {} is located at {}".format(object, cars[object]))
+    """ Simulate a plan by TransportValidator and return a pair (status, message) describing the first failing step. """
+    return TransportValidator(problem).validate([ action.name for action in solution ])
+
+# Plans of task_load.pddl checked by validator_test: (name, plan, claimed cost or None, whether the plan is correct).
+validator_cases = [
+    ("correct plan", ["(load box1 car1 place1)"], 1, True),
+    # The goal would be reached if the precondition (at car1 place1) of the second action was ignored.
+    ("inapplicable action", ["(move car1 place1 place2)", "(load box1 car1 place1)"], None, False),
+    ("unknown object", ["(load box3 car1 place1)"], None, False),
+    ("unreached goal", ["(move car1 place1 place2)"], None, False),
+    ("empty plan", [], None, False),
+    ("wrong cost", ["(load box1 car1 place1)"], 2, False),
+]
 
+def validator_test(domain_file, problem_file=None):
+    """ Check that TransportValidator accepts the correct plan of validator_cases and rejects all other plans. """
+    parser = Parser(domain_file, problem_file or os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_load.pddl"))
+    problem = parser.parse_problem(parser.parse_domain())
+    for name, plan, cost, valid in validator_cases:
+        status, msg = TransportValidator(problem).validate(plan, cost)
+        logging.info("Validator on {}: {}".format(name, msg))
+        if status != valid:
+            return (False, "Validator {} a plan with {}: {}".format("rejects" if valid else "accepts", name, msg))
     return (True, "Correct")
 
-def run_problem(domain_file, name, problem_file, feasible):
-    problem, solution = pyperplan_solver(problem_file, domain_file)
+def run_problem(domain_file, name, problem_file, feasible, cache=True, search_name="bfs", heuristic_name="hff", statistics=None):
+    problem, solution = pyperplan_solver(problem_file, domain_file, cache, search_name, heuristic_name, statistics)
     if not solution:
         if feasible:
             return (False, "Problem {} is feasible".format(name))
@@ -128,31 +111,90 @@ def run_problem(domain_file, name, problem_file, feasible):
 
     return (status, msg)
 
-def pddl_test(domain_file, name, problem_file, feasible):
-    (status,msg) = run_problem(domain_file, name, problem_file, feasible)
+def pddl_test(domain_file, name, problem_file, feasible, cache=True, search_name="bfs", heuristic_name="hff", statistics=None):
+    (status,msg) = run_problem(domain_file, name, problem_file, feasible, cache, search_name, heuristic_name, statistics)
     if status:
         logging.info(msg)
     else:
         logging.error(msg)
     return (status,msg)
 
-def usage(str):
-    print(str)
-    print("Usage: transport_test [ domain_file [ problem ] ]")
-    exit(1)
+def result_row(name, running_time, statistics, msg):
+    """ Return a row of the PrettyTable of results. """
+    plan_length = statistics.get("plan_length")
+    return [name, 1, "< 0.1", running_time, statistics.get("expansions", "-"), "-" if plan_length is None else plan_length, msg]
+
+def limited_test(args, name, problem_file, feasible, connection):
+    """
+        Run a test in a worker process whose address space is limited to args.memory MiB
+        and send a tuple (status, message, statistics, running time) back.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.memory > 0:
+        limit = args.memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    statistics = {}
+    start_time = time()
+    try:
+        status, msg = pddl_test(args.domain_file, name, problem_file, feasible, args.cache, args.search, args.heuristic, statistics)
+    except MemoryError:
+        status, msg = False, "Out of memory (limit {} MiB)".format(args.memory)
+    connection.send((status, msg, statistics, time() - start_time))
+    connection.close()
+
+def pddl_tests_parallel(tests, names, args):
+    """
+        Run tests in at most args.jobs worker processes at once and return rows of the PrettyTable in the order of names.
+        Every worker runs limited_test and it is killed if it does not finish in args.timeout seconds.
+    """
+    rows = {}
+    pending = list(names)
+    running = {}
+    while pending or running:
+        while pending and len(running) < args.jobs:
+            name = pending.pop(0)
+            problem_file, feasible = tests[name]
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=limited_test, args=(args, name, problem_file, feasible, sender))
+            process.start()
+            sender.close()
+            running[receiver] = (name, process, time())
+        deadline = min(start_time for _, _, start_time in running.values()) + args.timeout
+        for receiver in multiprocessing.connection.wait(list(running), max(0, deadline - time())):
+            name, process, start_time = running.pop(receiver)
+            try:
+                status, msg, statistics, running_time = receiver.recv()
+            except EOFError:
+                process.join()
+                statistics, running_time = {}, time() - start_time
+                msg = "Crashed with exit code {}".format(process.exitcode)
+            process.join()
+            rows[name] = result_row(name, running_time, statistics, msg)
+            print("Finished test", name, "-", msg, flush=True)
+        for receiver, (name, process, start_time) in list(running.items()):
+            if time() - start_time >= args.timeout:
+                process.kill()
+                process.join()
+                del running[receiver]
+                rows[name] = result_row(name, time() - start_time, {}, "Timeout after {} s".format(args.timeout))
+                print("Finished test", name, "- timeout", flush=True)
+    return [ rows[name] for name in names ]
 
 def parse_args():
-    if len(sys.argv) <= 1:
-        return "domain.pddl", None
-    if len(sys.argv) >= 4:
-        usage("At most two arguments expected.")
-    domain_file = sys.argv[1]
-    if not os.path.isfile(domain_file):
-        usage(domain_file + " is not a file.")
-    if len(sys.argv) == 2:
-        return domain_file, None
-    problem = sys.argv[2]
-    return domain_file, problem
+    parser = argparse.ArgumentParser(prog="transport_test")
+    parser.add_argument("domain_file", nargs="?", default="domain.pddl", help="Domain definition file; domain.pddl by default")
+    parser.add_argument("problem", nargs="?", help="Run only the test of a given name")
+    parser.add_argument("--search", choices=search_algorithms, default="bfs", help="Search algorithm of pyperplan")
+    parser.add_argument("--heuristic", choices=heuristics, default="hff", help="Heuristic of pyperplan used by all search algorithms except bfs")
+    parser.add_argument("--jobs", type=int, default=0, help="Run every test in a worker process, at most a given number of them at once")
+    parser.add_argument("--timeout", type=float, default=60, help="With --jobs, kill a test after a given number of seconds")
+    parser.add_argument("--memory", type=int, default=2048, help="With --jobs, limit the address space of every test to a given number of MiB; 0 for no limit")
+    parser.add_argument("--validator", action="store_true", help="Check that the plan validator rejects incorrect plans of task_load.pddl")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Ground every problem again instead of loading it from " + transport_cache.CACHE_DIR)
+    args = parser.parse_args()
+    if not os.path.isfile(args.domain_file):
+        parser.error(args.domain_file + " is not a file.")
+    return args
 
 def main():
     tests = {
@@ -168,7 +210,8 @@ def main():
         "three_cars": ("task_three_cars.pddl", True),
     }
 
-    domain_file, problem = parse_args()
+    args = parse_args()
+    domain_file, problem = args.domain_file, args.problem
 
     logging.basicConfig(
         level=getattr(logging, "INFO"),
@@ -176,21 +219,36 @@ def main():
         stream=sys.stdout,
     )
 
-    if not problem:
-        results = PrettyTable(["Test name", "Points", "Reference time [s]", "Your time [s]", "Evaluation"])
+    if args.validator:
+        status, msg = validator_test(domain_file)
+        print(msg)
+        return
+
+    columns = ["Test name", "Points", "Reference time [s]", "Your time [s]", "Expansions", "Plan length", "Evaluation"]
+    if args.jobs > 0:
+        if problem and not problem in tests:
+            print("Unknown test", problem)
+            return
+        results = PrettyTable(columns)
+        for row in pddl_tests_parallel(tests, [problem] if problem else list(tests), args):
+            results.add_row(row)
+        print(results)
+    elif not problem:
+        results = PrettyTable(columns)
         for problem in tests:
             print("=====================================   TEST  ", problem, "    ================================")
             problem_file, feasible = tests[problem]
+            statistics = {}
             start_time = time()
-            status, msg = pddl_test(domain_file, problem, problem_file, feasible)
+            status, msg = pddl_test(domain_file, problem, problem_file, feasible, args.cache, args.search, args.heuristic, statistics)
             running_time = time() - start_time
             print()
-            results.add_row([problem, 1, "< 0.1", running_time, msg])
+            results.add_row(result_row(problem, running_time, statistics, msg))
         print(results)
     else:
         if problem in tests:
             problem_file, feasible = tests[problem]
-            status, msg = pddl_test(domain_file, problem, problem_file, feasible)
+            status, msg = pddl_test(domain_file, problem, problem_file, feasible, args.cache, args.search, args.heuristic)
         else:
             print("Unknown test", problem)
 
@@ -200,6 +258,22 @@ $ python3 transport_tests.py
 
 To run a test NAME, run the command
 $ python3 transport_tests.py NAME
+
+To use another search algorithm of pyperplan, e.g. A* with the heuristic hmax, run the command
+$ python3 transport_tests.py --search astar --heuristic hmax
+Expansions and the plan length of every problem are printed in the table. Plans of gbfs and ehc need not be optimal
+and ehc is incomplete, so it may fail on a feasible problem.
+
+To check that the plan validator rejects plans with an inapplicable action, an unreached goal or a wrong cost, run the command
+$ python3 transport_tests.py --validator
+
+To run tests in N worker processes at once, each of them killed after 60 seconds or limited to 2048 MiB, run the command
+$ python3 transport_tests.py --jobs N
+Limits are changed by options --timeout SECONDS and --memory MiB; a test exceeding them is reported as a timeout or out of memory.
+
+Grounded problems are cached in the directory .grounding_cache next to this script and keyed by sha256 of the domain and the problem,
+so a changed domain file is grounded again. To ground every problem without the cache, add the option
+$ python3 transport_tests.py --no-cache
 """
 if __name__ == "__main__":
     main()
@@ -0,0 +1,138 @@
+import logging
+
+def object_type(name):
+    """ Return car, box or place by the name of an object like car1, or None for other names. """
+    prefix = name.rstrip("0123456789")
+    return prefix if prefix in ["car", "box", "place"] and prefix != name else None
+
+class TransportValidator:
+    """
+        Validator of plans of the transport problem which does not depend on the tested domain.
+        Every fact (at box place), (in box car), (at car place) and (empty car) of the problem gets an integer id once,
+        so states are integers whose i-th bit is set if the i-th fact holds.
+        Every action is translated once to bitsets of preconditions, add effects and delete effects
+        and applying an action needs only a few bit operations.
+        Cars can move between any two places like in the bundled tasks.
+    """
+
+    def __init__(self, problem):
+        """ problem - parsed problem of pyperplan; types of objects are given by their names like the tests expect """
+        self.objects = { o: object_type(o) for o in problem.objects }
+        self.cars = [ o for o, t in self.objects.items() if t == "car" ]
+        self.places = [ o for o, t in self.objects.items() if t == "place" ]
+        self.boxes = [ o for o, t in self.objects.items() if t == "box" ]
+        self.facts = []
+        self.ids = {}
+        for box in self.boxes:
+            for place in self.places:
+                self.add_fact("at", box, place)
+            for car in self.cars:
+                self.add_fact("in", box, car)
+        for car in self.cars:
+            for place in self.places:
+                self.add_fact("at", car, place)
+            self.add_fact("empty", car)
+        self.actions = {}
+
+        self.initial_state = sum(self.bit("empty", car) for car in self.cars)
+        for state in problem.initial_state:
+            if state.name == "at":
+                self.initial_state |= self.at(state.signature[0][0], state.signature[1][0], "Initial state")
+                if self.objects.get(state.signature[1][0]) == "car":
+                    self.initial_state &= ~self.bit("empty", state.signature[1][0])
+        self.goals = 0
+        for goal in problem.goal:
+            assert(goal.name == "at")
+            self.goals |= self.at(goal.signature[0][0], goal.signature[1][0], "Goal")
+
+    def add_fact(self, *fact):
+        self.ids[fact] = len(self.facts)
+        self.facts.append(fact)
+
+    def bit(self, *fact):
+        return 1 << self.ids[fact]
+
+    def at(self, obj, location, description):
+        """ Return the bit of a fact (at obj location) of the initial state or the goal. """
+        assert(self.objects.get(obj) in ["car", "box"] and self.objects.get(location) in ["car", "place"])
+        logging.info("{}: {} is located at {}".format(description, obj, location))
+        if self.objects[obj] == "car":
+            assert(self.objects[location] == "place")
+            return self.bit("at", obj, location)
+        return self.bit("at" if self.objects[location] == "place" else "in", obj, location)
+
+    def action(self, name):
+        """
+            Return a tuple (preconditions, add effects, delete effects) of an action given by its name like (load box1 car1 place1),
+            or an error message if the action or its arguments are invalid. Results are cached.
+        """
+        if name in self.actions:
+            return self.actions[name]
+        action = name[1:-1].split()
+        if len(action) != 4 or action[0] not in ["load", "unload", "move"]:
+            result = "Invalid action {}".format(name)
+        elif action[0] in ["load", "unload"]:
+            _, box, car, place = action
+            if self.objects.get(box) != "box":
+                result = "Cannot load {} in a car".format(box)
+            elif self.objects.get(car) != "car":
+                result = "{} is not a car".format(car)
+            elif self.objects.get(place) != "place":
+                result = "{} is not a place".format(place)
+            elif action[0] == "load":
+                result = (self.bit("at", box, place) | self.bit("at", car, place) | self.bit("empty", car),
+                    self.bit("in", box, car), self.bit("at", box, place) | self.bit("empty", car))
+            else:
+                result = (self.bit("in", box, car) | self.bit("at", car, place),
+                    self.bit("at", box, place) | self.bit("empty", car), self.bit("in", box, car))
+        else:
+            _, car, src, dst = action
+            if self.objects.get(car) != "car":
+                result = "{} is not a car".format(car)
+            elif self.objects.get(src) != "place":
+                result = "{} is not a place".format(src)
+            elif self.objects.get(dst) != "place":
+                result = "{} is not a place".format(dst)
+            else:
+                result = (self.bit("at", car, src), self.bit("at", car, dst), self.bit("at", car, src))
+        self.actions[name] = result
+        return result
+
+    def describe(self, fact, state):
+        """ Return a message explaining that a fact does not hold in a state. """
+        kind, obj = fact[0], fact[1]
+        if kind == "empty":
+            return "Car {} is full".format(obj)
+        where = [ f[2] for i, f in enumerate(self.facts) if f[1] == obj and f[0] != "empty" and state >> i & 1 ]
+        location = where[0] if where else "nowhere"
+        if kind == "in":
+            return "Box {} is not loaded in car {} but located at {}".format(obj, fact[2], location)
+        return "{} {} is not located at {} but at {}".format(self.objects[obj].capitalize(), obj, fact[2], location)
+
+    def missing(self, required, state):
+        """ Return the first fact of a bitset required which does not hold in a state. """
+        lacking = required & ~state
+        return self.facts[(lacking & -lacking).bit_length() - 1]
+
+    def validate(self, plan, cost=None):
+        """
+            Simulate a plan given by a list of names of actions from the initial state.
+            If cost is given, it is the cost claimed by a planner and it has to be the number of actions since every action costs 1.
+            Return a pair (status, message) where the message describes the first failing step, an unreached goal or a wrong cost.
+            Steps are not logged since logging every action takes more time than its simulation.
+        """
+        state = self.initial_state
+        actions = self.actions
+        for step, name in enumerate(plan, 1):
+            action = actions.get(name) or self.action(name)
+            if isinstance(action, str):
+                return (False, "Step {} {}: {}".format(step, name, action))
+            pre, add, delete = action
+            if pre & state != pre:
+                return (False, "Step {} {}: {}".format(step, name, self.describe(self.missing(pre, state), state)))
+            state = state & ~delete | add
+        if self.goals & state != self.goals:
+            return (False, self.describe(self.missing(self.goals, state), state))
+        if cost is not None and cost != len(plan):
+            return (False, "Plan has cost {} but cost {} is claimed".format(len(plan), cost))
+        return (True, "Correct")
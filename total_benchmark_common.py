@@ -0,0 +1,179 @@
+import os
+import csv
+import json
+import argparse
+import signal
+import resource
+import multiprocessing
+from statistics import mean
+from time import perf_counter
+from prettytable import PrettyTable
+import networkx
+
+# Generators of benchmarked graphs; every generator gets a size, the arguments of the command line and a seed.
+families = {
+    "regular": lambda size, args, seed: networkx.random_regular_graph(args.degree, size, seed),
+    "gnp": lambda size, args, seed: networkx.gnp_random_graph(size, args.probability, seed),
+    "grid": lambda size, args, seed: networkx.grid_2d_graph(size, size),
+    "hypercube": lambda size, args, seed: networkx.hypercube_graph(size),
+    "star": lambda size, args, seed: networkx.star_graph(size),
+}
+
+# Families which ignore the seed; a single graph of every size is benchmarked regardless of --graphs.
+deterministic_families = {"grid", "hypercube", "star"}
+
+# Default sizes of every family: numbers of vertices, sides of grids, dimensions of hypercubes and numbers of leaves of stars.
+default_sizes = {
+    "regular": [10, 20, 40, 80],
+    "gnp": [10, 20, 40, 80],
+    "grid": [3, 5, 8, 12],
+    "hypercube": [2, 3, 4, 5, 6, 7],
+    "star": [50, 100, 200, 400],
+}
+
+def run_solver(solve, graph, options, connection):
+    """
+        Solve a graph by a function solve in a child process and send a tuple (number of colors, time, peak RSS in KiB, SAT solvers) back
+        where SAT solvers is a list of pysat solvers which answered, see total_sat.solve_formula, and it is empty for other solvers.
+        Peak RSS is the maximum of the process and of its finished children, e.g. workers of the decomposition and of a portfolio.
+        The process leads a new process group, so benchmark_case can kill it together with its children.
+    """
+    os.setpgrp()
+    start_time = perf_counter()
+    colors = solve(graph, **options)
+    running_time = perf_counter() - start_time
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    connection.send((colors, running_time, rss, graph.graph.get("sat_solvers", [])))
+    connection.close()
+
+def kill_group(process):
+    """ Kill a process started by run_solver together with all processes of its group. """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # The process has not created its group yet.
+        process.kill()
+
+def benchmark_case(solve, graph, options, repeat, timeout):
+    """
+        Solve a graph repeat times, every time in a new process which is killed with its children after timeout seconds.
+        Return a tuple (status, number of colors, list of times, peak RSS in KiB, set of SAT solvers which answered).
+    """
+    times = []
+    colors, peak, answered = None, 0, set()
+    for _ in range(repeat):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=run_solver, args=(solve, graph, options, sender))
+        process.start()
+        sender.close()
+        if not receiver.poll(timeout):
+            kill_group(process)
+            process.join()
+            return ("timeout" if process.exitcode == -9 else "failed", colors, times, peak, answered)
+        try:
+            colors, running_time, rss, sat_solvers = receiver.recv()
+        except EOFError:
+            process.join()
+            return ("failed", colors, times, peak, answered)
+        process.join()
+        times.append(running_time)
+        peak = max(peak, rss)
+        answered.update(sat_solvers)
+    return ("ok", colors, times, peak, answered)
+
+def benchmark(args, solver, solve, options, problem_size, size_columns, sat_solvers=False):
+    """
+        Run all benchmarks given by the command line and return a list of dictionaries, one for every graph.
+        solver - name of the benchmarked solver stored in every record, e.g. "csp" or "sat"
+        solve - total_coloring of the solver; it is called with a graph and options as keyword arguments
+        problem_size - function returning a tuple of sizes of the problem of the whole graph
+        size_columns - dictionary mapping keys of records to headers of the table, one for every size of problem_size
+        sat_solvers - store names of SAT solvers which answered in every record
+    """
+    records = []
+    for family in args.families:
+        for size in args.sizes or default_sizes[family]:
+            graphs = 1 if family in deterministic_families else args.graphs
+            for seed in range(args.seed, args.seed + graphs):
+                try:
+                    graph = families[family](size, args, seed)
+                except networkx.NetworkXError as error:
+                    print("Skipping", family, size, "seed", seed, "-", error)
+                    continue
+                print("Running", family, size, "seed", seed, flush=True)
+                sizes = problem_size(graph)
+                status, colors, times, peak, answered = benchmark_case(solve, graph, options, args.repeat, args.timeout)
+                record = {
+                    "solver": solver, "family": family, "size": size, "seed": seed,
+                    "vertices": graph.number_of_nodes(), "edges": graph.number_of_edges(),
+                    "max_degree": max((graph.degree[v] for v in graph.nodes), default=0),
+                }
+                record.update(zip(size_columns, sizes))
+                record.update({
+                    "status": status, "colors": colors,
+                    "runs": len(times),
+                    "time_min": min(times) if times else None,
+                    "time_mean": mean(times) if times else None,
+                    "peak_rss_kib": peak or None,
+                })
+                if sat_solvers:
+                    record["sat_solvers"] = " ".join(sorted(answered))
+                records.append(record)
+    return records
+
+def results_table(records, size_columns, sat_solvers=False):
+    """ Return a PrettyTable with benchmark records; size_columns and sat_solvers are the same as in benchmark. """
+    columns = ["Family", "Size", "Seed", "Vertices", "Edges", "D", *size_columns.values(), "Status", "Colors", "Min time [s]", "Mean time [s]", "Peak RSS [MiB]"]
+    if sat_solvers:
+        columns.append("SAT solvers")
+    table = PrettyTable(columns)
+    for r in records:
+        row = [r["family"], r["size"], r["seed"], r["vertices"], r["edges"], r["max_degree"],
+            *(r[key] for key in size_columns), r["status"], r["colors"] if r["colors"] is not None else "-",
+            "{:.3f}".format(r["time_min"]) if r["time_min"] is not None else "-",
+            "{:.3f}".format(r["time_mean"]) if r["time_mean"] is not None else "-",
+            "{:.1f}".format(r["peak_rss_kib"] / 1024) if r["peak_rss_kib"] else "-"]
+        if sat_solvers:
+            row.append(r["sat_solvers"] or "-")
+        table.add_row(row)
+    return table
+
+def save(records, filename):
+    """ Save records into a JSON file if the filename ends with .json and into a CSV file otherwise. """
+    with open(filename, "w", newline="") as f:
+        if filename.endswith(".json"):
+            json.dump(records, f, indent=1)
+        else:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+
+def argument_parser():
+    """ Return an argparse.ArgumentParser with options of benchmarks of all solvers; a benchmark may add its own options. """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("families", nargs="*", help="Benchmarked families of graphs: " + ", ".join(families) + "; all families by default")
+    parser.add_argument("--sizes", nargs="+", type=int, help="Sizes of graphs; default sizes of every family by default")
+    parser.add_argument("--degree", type=int, default=3, help="Degree of random regular graphs")
+    parser.add_argument("--probability", type=float, default=0.2, help="Probability of an edge in G(n,p) graphs")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first random graph")
+    parser.add_argument("--graphs", type=int, default=1, help="Number of random graphs of every size with consecutive seeds; grids, hypercubes and stars are generated once")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs of the solver on every graph")
+    parser.add_argument("--timeout", type=float, default=60, help="Time limit of a single run in seconds")
+    parser.add_argument("--no-symmetry", dest="symmetry", action="store_false", help="Do not fix colors of a vertex of the maximum degree and its edges")
+    parser.add_argument("--no-bounds", dest="bounds", action="store_false", help="Always run the solver from D+1 colors without total_bounds")
+    parser.add_argument("--no-decompose", dest="decompose", action="store_false", help="Solve the whole graph instead of its biconnected components")
+    parser.add_argument("--output", help="Save results into a CSV file or a JSON file if the name ends with .json")
+    return parser
+
+def run_benchmark(args, solver, solve, options, problem_size, size_columns, sat_solvers=False):
+    """ Run benchmark for parsed arguments of argument_parser, print the table of results and save them if requested. """
+    for family in args.families:
+        if not family in families:
+            print("Unknown family", family)
+            return
+    args.families = args.families or list(families)
+
+    records = benchmark(args, solver, solve, options, problem_size, size_columns, sat_solvers)
+    print(results_table(records, size_columns, sat_solvers))
+    if args.output and records:
+        save(records, args.output)
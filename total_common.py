@@ -0,0 +1,308 @@
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx
+
+
+def total_bounds(graph):
+    """
+        Find bounds on the total chromatic index of a graph together with a total coloring attaining the upper bound.
+        graph - instance of networkx.Graph
+        returns - a tuple (lower, upper, node colors, edge colors) where colors are dictionaries with values from 0 to upper-1
+            and edges are keyed by pairs (u, v) in the orientation of graph.edges
+
+        A vertex of the maximum degree D and its incident edges form a clique of the total graph, so at least D+1 colors are needed.
+        The total chromatic index is known for complete graphs, complete bipartite graphs and cycles,
+        and a coloring with this number of colors is constructed directly, so lower == upper.
+        Otherwise, the upper bound is given by greedy_total_coloring.
+    """
+    if graph.number_of_nodes() == 0:
+        return 0, 0, {}, {}
+    for closed_form in [edgeless_total_coloring, complete_total_coloring, complete_bipartite_total_coloring, cycle_total_coloring]:
+        coloring = closed_form(graph)
+        if coloring is not None:
+            colors, node_colors, edge_colors = coloring
+            return colors, colors, node_colors, edge_colors
+    max_deg = max(graph.degree[v] for v in graph.nodes)
+    colors, node_colors, edge_colors = greedy_total_coloring(graph)
+    return max_deg + 1, colors, node_colors, edge_colors
+
+
+def assign_coloring(graph, node_colors, edge_colors):
+    """ Assign property "color" for every vertex and edge from dictionaries returned by total_bounds. """
+    for u in graph.nodes:
+        graph.nodes[u]["color"] = node_colors[u]
+    for u, v in graph.edges:
+        graph.edges[u, v]["color"] = edge_colors[u, v]
+
+
+def greedy_total_coloring(graph):
+    """
+        Color vertices and edges in the order of breadth-first search from a vertex of the maximum degree in every component:
+        a vertex is followed by its uncolored edges, each of them followed by its other endpoint.
+        Every element gets the smallest color not used by its colored neighbours in the total graph.
+        At most 2D+1 colors are used; forests with D >= 2 get exactly D+1 colors.
+        returns - a tuple (number of colors, node colors, edge colors)
+    """
+    # Colors of edges are stored in both orientations.
+    node_colors = {}
+    edge_colors = {}
+
+    def smallest(used):
+        c = 0
+        while c in used:
+            c += 1
+        return c
+
+    def color_node(u):
+        used = set(node_colors[w] for w in graph[u] if w in node_colors)
+        used.update(edge_colors[u, w] for w in graph[u] if (u, w) in edge_colors)
+        node_colors[u] = smallest(used)
+
+    def color_edge(u, v):
+        used = set(node_colors[w] for w in (u, v) if w in node_colors)
+        for x in (u, v):
+            used.update(edge_colors[x, w] for w in graph[x] if (x, w) in edge_colors)
+        edge_colors[u, v] = edge_colors[v, u] = smallest(used)
+
+    for root in sorted(graph.nodes, key=lambda u: -graph.degree[u]):
+        if root in node_colors:
+            continue
+        color_node(root)
+        queue = [root]
+        for u in queue:
+            for v in graph[u]:
+                if (u, v) in edge_colors:
+                    continue
+                color_edge(u, v)
+                if v not in node_colors:
+                    color_node(v)
+                    queue.append(v)
+
+    edge_colors = { (u, v): edge_colors[u, v] for u, v in graph.edges }
+    colors = 1 + max(list(node_colors.values()) + list(edge_colors.values()))
+    return colors, node_colors, edge_colors
+
+
+def edgeless_total_coloring(graph):
+    """ A graph without edges needs a single color. """
+    if graph.number_of_edges() > 0:
+        return None
+    return 1, { u: 0 for u in graph.nodes }, {}
+
+
+def complete_total_coloring(graph):
+    """
+        The complete graph on n vertices needs n colors if n is odd and n+1 colors if n is even.
+        Using m = n for odd n and m = n+1 for even n, the i-th vertex gets the color 2i mod m and the edge ij gets i+j mod m.
+    """
+    n = graph.number_of_nodes()
+    if n < 2 or graph.number_of_edges() != n * (n - 1) // 2 or networkx.number_of_selfloops(graph) > 0:
+        return None
+    m = n if n % 2 == 1 else n + 1
+    index = { u: i for i, u in enumerate(graph.nodes) }
+    node_colors = { u: 2 * i % m for u, i in index.items() }
+    edge_colors = { (u, v): (index[u] + index[v]) % m for u, v in graph.edges }
+    return m, node_colors, edge_colors
+
+
+def complete_bipartite_total_coloring(graph):
+    """
+        The complete bipartite graph with parts of sizes a <= b needs b+1 colors if a < b and b+2 colors if a == b.
+        Edges between the i-th vertex of the smaller part and the j-th vertex of the larger part get the color i+j mod b,
+        vertices of the smaller part get the color b and the j-th vertex of the larger part gets the color a+j mod b
+        which is missing on its edges, or the color b+1 if a == b.
+    """
+    if graph.number_of_edges() == 0 or not networkx.is_connected(graph) or not networkx.is_bipartite(graph):
+        return None
+    small, large = networkx.bipartite.sets(graph)
+    if len(small) > len(large):
+        small, large = large, small
+    a, b = len(small), len(large)
+    if graph.number_of_edges() != a * b:
+        return None
+    index = { u: i for i, u in enumerate(small) }
+    index.update({ u: j for j, u in enumerate(large) })
+    node_colors = { u: b for u in small }
+    node_colors.update({ u: (a + j) % b if a < b else b + 1 for u, j in ((u, index[u]) for u in large) })
+    edge_colors = { (u, v): (index[u] + index[v]) % b for u, v in graph.edges }
+    return (b + 1 if a < b else b + 2), node_colors, edge_colors
+
+
+def cycle_total_coloring(graph):
+    """
+        The cycle of length n needs 3 colors if n is divisible by 3 and 4 colors otherwise.
+        Elements along the cycle v0, v0v1, v1, v1v2, ... form the square of a cycle of length 2n in the total graph,
+        which is colored by blocks 0,1,2 followed by (2n mod 3) blocks 0,1,2,3.
+    """
+    n = graph.number_of_nodes()
+    if n < 3 or graph.number_of_edges() != n or any(graph.degree[u] != 2 for u in graph.nodes) or not networkx.is_connected(graph):
+        return None
+    length = 2 * n
+    long_blocks = length % 3
+    pattern = [0, 1, 2] * ((length - 4 * long_blocks) // 3) + [0, 1, 2, 3] * long_blocks
+
+    node_colors = {}
+    edge_colors = {}
+    previous, u = None, next(iter(graph.nodes))
+    for i in range(n):
+        node_colors[u] = pattern[2 * i]
+        v = next(w for w in graph[u] if w != previous)
+        edge_colors[u, v] = edge_colors[v, u] = pattern[2 * i + 1]
+        previous, u = u, v
+    edge_colors = { (u, v): edge_colors[u, v] for u, v in graph.edges }
+    return (3 if long_blocks == 0 else 4), node_colors, edge_colors
+
+
+def symmetry_breaking(graph):
+    """
+        Find colors which may be fixed in a total coloring of a graph without loss of generality.
+        graph - instance of networkx.Graph
+        returns - a pair of dictionaries (vertex colors, edge colors) where edges are keyed by pairs (u, v) in the orientation of graph.edges(u)
+
+        Every permutation of colors maps a total coloring to a total coloring, so the colors of any clique of the total graph may be fixed.
+        A vertex v of the maximum degree and all its incident edges are pairwise adjacent in the total graph,
+        so v gets the color 0 and its edges get colors 1, 2, ..., deg(v).
+        Neighbours of v are not pinned since they are not adjacent to all edges of v.
+    """
+    if graph.number_of_nodes() == 0:
+        return {}, {}
+    v = max(graph.nodes, key=lambda u: graph.degree[u])
+    return { v: 0 }, { e: c for c, e in enumerate(graph.edges(v), 1) }
+
+
+def decomposed_total_coloring(graph, solve, blocks=True, bounds=True, processes=None):
+    """
+        Find total chromatic index and total coloring by solving pieces of a graph independently.
+        graph - instance of networkx.Graph
+        solve - function which finds total chromatic index of a graph and assigns property "color" like total_coloring;
+            it gets a keyword argument minimum which is a number of colors needed anyway, so fewer colors need not be tried,
+            and a keyword argument known_bounds which is the result of total_bounds for the graph if it was computed, otherwise None;
+            it has to be picklable, e.g. a function defined in a module or functools.partial of it
+        blocks - split graph into biconnected components; otherwise only into connected components
+        bounds - color the graph or its pieces settled by total_bounds directly instead of calling solve
+        processes - number of worker processes solving pieces which are not settled by total_bounds; os.cpu_count() by default
+        returns - total chromatic index x
+        Furthermore, assign property "color" for every vertex and edge. The value of the color is an integer between 0 and x-1.
+
+        Every piece is a subgraph, so its total chromatic index is a lower bound, and so is D+1 for the maximum degree D of graph.
+        Colorings of connected components are independent. Biconnected components are merged along the block-cut tree:
+        a block sharing a cut vertex v with already colored blocks is recolored by a permutation which keeps the color of v
+        and maps colors of its edges at v to colors not used at v yet, which is possible with D+1 colors.
+        Therefore, the result is the maximum of both lower bounds and it is optimal.
+    """
+    known_bounds = None
+    if bounds:
+        known_bounds = lower, upper, node_colors, edge_colors = total_bounds(graph)
+        if lower == upper:
+            assign_coloring(graph, node_colors, edge_colors)
+            return upper
+    if blocks:
+        pieces = [ graph.subgraph(b).copy() for b in networkx.biconnected_components(graph) ]
+    else:
+        pieces = [ graph.subgraph(c).copy() for c in networkx.connected_components(graph) if len(c) > 1 ]
+    if len(pieces) <= 1:
+        return solve(graph, known_bounds=known_bounds)
+    # Graph attributes of a copy are shared with graph, so every piece gets its own lists which are concatenated below.
+    for piece in pieces:
+        piece.graph = { key: [] if isinstance(value, list) else value for key, value in graph.graph.items() }
+
+    # Pieces settled by total_bounds are colored directly, other pieces are solved by worker processes.
+    # A piece is also settled if its upper bound is at most D+1 since the merged coloring needs D+1 colors anyway.
+    max_deg = max(graph.degree[v] for v in graph.nodes)
+    colorings = [None] * len(pieces)
+    piece_bounds = [None] * len(pieces)
+    unsettled = []
+    for i, piece in enumerate(pieces):
+        if not bounds:
+            unsettled.append(i)
+            continue
+        piece_bounds[i] = lower, upper, node_colors, edge_colors = total_bounds(piece)
+        if lower == upper or upper <= max_deg + 1:
+            colorings[i] = upper, node_colors, edge_colors
+        else:
+            unsettled.append(i)
+    processes = min(processes or os.cpu_count() or 1, len(unsettled))
+    solve_unsettled = partial(solve_piece, solve, max_deg + 1)
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            solved = list(pool.map(solve_unsettled, [ pieces[i] for i in unsettled ], [ piece_bounds[i] for i in unsettled ]))
+    else:
+        solved = [ solve_unsettled(pieces[i], piece_bounds[i]) for i in unsettled ]
+    for i, (count, piece_nodes, piece_edges, attributes) in zip(unsettled, solved):
+        colorings[i] = count, piece_nodes, piece_edges
+        # Lists in graph attributes of pieces, e.g. sat_solvers of total_sat, are concatenated.
+        for key, value in attributes.items():
+            if isinstance(value, list):
+                graph.graph.setdefault(key, []).extend(value)
+
+    colors = max([max_deg + 1] + [ count for count, _, _ in colorings ])
+    node_colors = { u: 0 for u in graph.nodes }
+    edge_colors = {}
+    if blocks:
+        merge_blocks(graph, pieces, colorings, colors, node_colors, edge_colors)
+    else:
+        for _, piece_nodes, piece_edges in colorings:
+            node_colors.update(piece_nodes)
+            edge_colors.update(piece_edges)
+    assign_coloring(graph, node_colors, { (u, v): edge_colors[u, v] if (u, v) in edge_colors else edge_colors[v, u] for u, v in graph.edges })
+    return colors
+
+
+def solve_piece(solve, minimum, piece, known_bounds):
+    """
+        Solve a piece with the result of total_bounds for it, or None, and return a tuple
+        (number of colors, node colors, edge colors, graph attributes) which can be sent between processes.
+    """
+    count = solve(piece, minimum=minimum, known_bounds=known_bounds)
+    return count, { u: piece.nodes[u]["color"] for u in piece.nodes }, { (u, v): piece.edges[u, v]["color"] for u, v in piece.edges }, piece.graph
+
+
+def merge_blocks(graph, pieces, colorings, colors, node_colors, edge_colors):
+    """
+        Merge colorings of blocks in the breadth-first order of the block-cut tree of every component.
+        Every block is recolored by a permutation of colors 0, ..., colors-1 as described in decomposed_total_coloring.
+    """
+    blocks_of = {}
+    for i, piece in enumerate(pieces):
+        for u in piece.nodes:
+            blocks_of.setdefault(u, []).append(i)
+    # Colors of edges incident to every vertex which are already merged.
+    at = { u: set() for u in graph.nodes }
+    merged = [False] * len(pieces)
+    colored = set()
+
+    for root in range(len(pieces)):
+        if merged[root]:
+            continue
+        merged[root] = True
+        queue = [root]
+        for i in queue:
+            piece = pieces[i]
+            _, piece_nodes, piece_edges = colorings[i]
+            shared = [ u for u in piece.nodes if u in colored ]
+            permutation = {}
+            if shared:
+                v = shared[0]
+                permutation[piece_nodes[v]] = node_colors[v]
+                free = [ c for c in range(colors) if c not in at[v] and c != node_colors[v] ]
+                for w in piece[v]:
+                    permutation[piece_edges[v, w] if (v, w) in piece_edges else piece_edges[w, v]] = free.pop(0)
+            rest = [ c for c in range(colors) if c not in permutation.values() ]
+            for c in range(colorings[i][0]):
+                if c not in permutation:
+                    permutation[c] = rest.pop(0)
+
+            for u, c in piece_nodes.items():
+                node_colors[u] = permutation[c]
+                colored.add(u)
+            for (u, w), c in piece_edges.items():
+                edge_colors[u, w] = permutation[c]
+                at[u].add(permutation[c])
+                at[w].add(permutation[c])
+            for u in piece.nodes:
+                for j in blocks_of[u]:
+                    if not merged[j]:
+                        merged[j] = True
+                        queue.append(j)